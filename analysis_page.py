@@ -0,0 +1,515 @@
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytz
+import streamlit as st
+
+import charts
+import db
+import insights
+import perf
+import resources
+import snapshot_index
+
+# "rollup" reads the per-day daily_rollup rows; "sql" pushes the insight
+# aggregations into GROUP BY queries over the events; "pandas" fetches every
+# row and aggregates locally
+AGGREGATION_ENGINE = os.getenv("AGGREGATION_ENGINE", "rollup").lower()
+# "png" renders insight charts with matplotlib; "native" uses vega-lite charts
+CHART_MODE = os.getenv("CHART_MODE", "png").lower()
+# Analysis period presets, in days ending today (IST)
+ANALYSIS_WINDOWS = {
+    "All time": None,
+    "Last 30 days": 30,
+    "Last 90 days": 90,
+    "Last 365 days": 365,
+    "Custom range": None,
+}
+
+
+# Rendered insight charts shared by every session
+@st.cache_resource
+def get_chart_cache():
+    return charts.ChartCache()
+
+
+def analysis_filters():
+    with st.expander("Filters"):
+        today = datetime.now(pytz.timezone(db.LOCAL_TIMEZONE)).date()
+        window = st.selectbox("Period:", list(ANALYSIS_WINDOWS), key="window")
+        start = end = None
+        if window == "Custom range":
+            selected = st.date_input(
+                "Dates:", value=(today - timedelta(days=30), today)
+            )
+            # A range picker returns one date while the second is being chosen
+            start, end = (tuple(selected) * 2)[:2] if selected else (None, None)
+        elif ANALYSIS_WINDOWS[window] is not None:
+            start, end = today - timedelta(days=ANALYSIS_WINDOWS[window] - 1), today
+        weekdays = st.multiselect(
+            "Days of the week (leave empty for all):", insights.DAY_ORDER
+        )
+        first_hour, last_hour = st.slider("Hours:", 0, 23, (0, 23))
+    hours = ()
+    if (first_hour, last_hour) != (0, 23):
+        hours = tuple(range(first_hour, last_hour + 1))
+    return insights.Filters(
+        start,
+        end,
+        tuple(insights.DAY_ORDER.index(day) for day in weekdays),
+        hours,
+    )
+
+
+def no_data(filters):
+    if filters.active():
+        st.error("No entries match the selected filters.")
+    else:
+        st.error("No data fetched from the MySQL database.")
+
+
+# A snapshot never changes once written; its creation time guards against a
+# directory replaced by a newer snapshot of the same name
+@st.cache_data(max_entries=4, show_spinner="Reading snapshot...")
+def load_snapshot_events(directory, created, table_name, filters):
+    # Imported here: pyarrow.dataset is only needed once a snapshot is read
+    import snapshot
+
+    return snapshot.read_events(directory, table_name, filters)
+
+
+@st.cache_data(max_entries=16, show_spinner="Reading snapshot...")
+def load_snapshot_counts(directory, created, table_name, filters):
+    import snapshot
+
+    return snapshot.query_counts(directory, table_name, filters)
+
+
+def snapshot_source():
+    # None reads the database; otherwise the chosen snapshot directory
+    snapshots = snapshot_index.list_snapshots()
+    if not snapshots:
+        return None
+    choice = st.selectbox(
+        "Source:",
+        [None, *snapshots],
+        format_func=lambda directory: (
+            "Database"
+            if directory is None
+            else f"Snapshot {os.path.basename(directory)}"
+        ),
+        key="analysis_source",
+    )
+    if choice is not None:
+        created = snapshot_index.manifest(choice)["created"]
+        st.caption(f"Snapshot taken {created} (UTC)")
+    return choice
+
+
+@perf.timed
+def fetch_data(data_type, filters, source=None):
+    try:
+        table_name = "raw_data" if data_type == "Raw Data" else "clean_data"
+        if source is not None:
+            created = snapshot_index.manifest(source)["created"]
+            df = load_snapshot_events(source, created, table_name, filters)
+        else:
+            with resources.get_pool().connection() as conn, db.cursor(conn) as cursor:
+                last_id = insights.high_water_mark(cursor, table_name)
+            df = resources.load_events(table_name, last_id, filters)
+
+        if df.empty:
+            no_data(filters)
+            return None
+
+        return df
+
+    except db.Error + (db.PoolTimeout,) as e:
+        st.error(f"MySQL Error: {e}")
+        return None
+
+    except Exception as e:
+        st.error(f"Error fetching data from MySQL database: {e}")
+        return None
+
+
+@perf.timed
+def fetch_counts(data_type, filters, source=None):
+    try:
+        table_name = "raw_data" if data_type == "Raw Data" else "clean_data"
+        if source is not None:
+            import snapshot
+
+            try:
+                created = snapshot_index.manifest(source)["created"]
+                counts = load_snapshot_counts(source, created, table_name, filters)
+            except snapshot.Error as e:
+                st.error(f"Error reading snapshot: {e}")
+                return None
+            if counts["daily"].empty:
+                no_data(filters)
+                return None
+            return counts
+        engine = AGGREGATION_ENGINE
+        width = st.session_state.get("bucket_width", insights.BUCKET_WIDTHS[-1])
+        if engine == "rollup" and width < 60:
+            # The rollup holds hours; finer buckets are counted from the events
+            engine = "sql"
+        pool = resources.get_pool()
+        with pool.connection() as conn, db.cursor(conn) as cursor:
+            counts = resources.get_counts_cache().counts(
+                cursor, table_name, pool.backend, engine, filters
+            )
+
+        if counts["daily"].empty:
+            no_data(filters)
+            return None
+
+        return counts
+
+    except db.Error + (db.PoolTimeout,) as e:
+        st.error(f"MySQL Error: {e}")
+        return None
+
+
+def total_rows(counts):
+    if counts is not None:
+        num_rows = counts["daily"].sum()
+        st.write(f"Total number of entries: {num_rows}")
+
+
+@perf.timed
+def display_insights(counts, native_charts=False):
+    if counts is not None:
+        # All charts are built up front and their images fetched together
+        width = st.session_state.get("bucket_width", insights.BUCKET_WIDTHS[-1])
+        insight_charts = build_charts(counts, width)
+        images = None
+        if not native_charts:
+            with perf.span("charts.render"):
+                images = get_chart_cache().render(insight_charts)
+        display_monthly_counts(counts, insight_charts, images)
+        display_avg_monthly_counts(counts, insight_charts, images)
+        display_date_with_highest_count(counts)
+        display_frequency_with_user_input(counts)
+        display_days_with_frequency(counts, insight_charts, images)
+        display_hourly_frequency(counts, insight_charts, images)
+
+
+def build_charts(counts, width):
+    monthly_counts = counts["monthly"]
+    monthly_avg = insights.monthly_average(monthly_counts)
+    day_of_week_counts = counts["weekday"]
+    hourly_frequency_df = insights.bin_minutes(counts["minutes"], width)
+    return {
+        "monthly": charts.BarChart(
+            "Total Number of Entries for Each Month and Year",
+            "Month and Year",
+            "Number of Entries",
+            tuple(monthly_counts.index.astype(str)),
+            tuple(monthly_counts.tolist()),
+            rotation=90,
+        ),
+        "monthly_avg": charts.BarChart(
+            "Average Count for Each Month",
+            "Month",
+            "Average Count",
+            tuple(monthly_avg.index.astype(str)),
+            tuple(monthly_avg.tolist()),
+            rotation=45,
+            ha="right",
+        ),
+        "weekday": charts.BarChart(
+            "Days of the Week and Their Frequencies",
+            "Day of the Week",
+            "Frequency",
+            tuple(day_of_week_counts.index),
+            tuple(day_of_week_counts.tolist()),
+            rotation=45,
+        ),
+        "hourly": charts.BarChart(
+            "Hourly Frequency",
+            "Hour Section",
+            "Frequency",
+            tuple(hourly_frequency_df["Hour Section"]),
+            tuple(hourly_frequency_df["Frequency"].tolist()),
+            rotation=45,
+            ha="right",
+        ),
+    }
+
+
+def show_chart(chart, image):
+    if image is None:
+        st.vega_lite_chart(
+            {"values": chart.records()}, chart.vega_lite(), use_container_width=True
+        )
+    else:
+        st.image(image)
+
+
+@perf.timed
+def display_monthly_counts(counts, insight_charts, images):
+    if counts is not None:
+        monthly_counts = counts["monthly"]
+
+        st.write("Total number of entries for each month and year:")
+        st.write(monthly_counts)
+
+        show_chart(insight_charts["monthly"], images and images["monthly"])
+        st.write("-" * 30)
+
+
+@perf.timed
+def display_avg_monthly_counts(counts, insight_charts, images):
+    if counts is not None:
+        monthly_avg = insights.monthly_average(counts["monthly"])
+        avg_monthly_df = pd.DataFrame(
+            {"Month": monthly_avg.index, "Average Count": monthly_avg.values}
+        )
+
+        st.write("Average count for each month:")
+        st.table(avg_monthly_df)
+
+        show_chart(insight_charts["monthly_avg"], images and images["monthly_avg"])
+
+        st.write(
+            f"Highest frequency month: {monthly_avg.idxmax()} ({monthly_avg.max():.2f})"
+        )
+        st.write("-" * 30)
+
+
+@perf.timed
+def display_date_with_highest_count(counts):
+    if counts is not None:
+        date_counts = counts["daily"]
+        max_count = date_counts.max()
+        dates_with_max_count = date_counts[date_counts == max_count]
+
+        st.write("Date(s) with the highest number of entries:")
+        dates_with_max_count_df = pd.DataFrame(
+            {"Date": dates_with_max_count.index, "Count": dates_with_max_count.values}
+        )
+        dates_with_max_count_df["Date"] = dates_with_max_count_df["Date"].dt.strftime(
+            "%Y-%m-%d"
+        )
+        st.table(dates_with_max_count_df)
+        st.write("-" * 30)
+
+
+@perf.timed
+def display_frequency_with_user_input(counts):
+    if counts is not None:
+        index = counts["frequency"]
+        frequencies = [int(frequency) for frequency in index.frequencies]
+
+        st.write("Possible frequencies are:")
+        st.write(", ".join(str(frequency) for frequency in frequencies))
+
+        user_input = st.number_input(
+            "Enter the frequency you want to see:",
+            min_value=frequencies[0],
+            max_value=frequencies[-1],
+            value=frequencies[-1],
+        )
+        match = st.radio(
+            "Days with:",
+            ("Exactly this frequency", "At least this frequency"),
+            horizontal=True,
+            key="frequency_match",
+        )
+
+        if match == "At least this frequency":
+            days = index.at_least(user_input)
+            st.write(f"Dates with at least {user_input} entries:")
+            st.write("Total count: ", str(index.count_at_least(user_input)))
+            st.dataframe(
+                pd.DataFrame(
+                    {"Date": days.index.strftime("%d %B %Y"), "Count": days.values}
+                ),
+                hide_index=True,
+            )
+        elif user_input in index.frequencies:
+            dates = index.exactly(user_input)
+            st.write(f"Dates with frequency {user_input}:")
+            st.write("Total count: ", str(len(dates)))
+            st.dataframe(
+                pd.DataFrame({"Date": dates.strftime("%d %B %Y")}), hide_index=True
+            )
+        else:
+            st.error(
+                "Frequency not found in the dataset. Please enter a valid frequency."
+            )
+
+        streak = index.longest_streak(user_input)
+        if streak is not None:
+            length, first, last = streak
+            st.write(
+                f"Longest streak with at least {user_input} entries a day: "
+                f"{length} days ({first:%d %B %Y} to {last:%d %B %Y})"
+            )
+        st.write("-" * 30)
+
+
+@perf.timed
+def display_days_with_frequency(counts, insight_charts, images):
+    day_of_week_counts = counts["weekday"]
+    day_of_week_counts_df = pd.DataFrame(
+        {"Days": day_of_week_counts.index, "Frequency": day_of_week_counts.values}
+    )
+
+    st.write("Days of the week and their frequencies:")
+    st.table(day_of_week_counts_df)
+
+    show_chart(insight_charts["weekday"], images and images["weekday"])
+
+    most_common_day = day_of_week_counts.idxmax()
+    least_common_day = day_of_week_counts.idxmin()
+
+    st.write(f"Most common day in the week: {most_common_day}")
+    st.write(f"Least common day in the week: {least_common_day}")
+
+    total_frequency = sum(day_of_week_counts)
+    most_common_day_frequency = day_of_week_counts[most_common_day]
+    chance_most_common_day = most_common_day_frequency / total_frequency * 100
+    st.write(
+        f"Likelihood of doing the task on {most_common_day}: {chance_most_common_day:.2f}%"
+    )
+    st.write("-" * 30)
+
+
+@perf.timed
+def display_hourly_frequency(counts, insight_charts, images):
+    width = st.radio(
+        "Bucket width (minutes):",
+        insights.BUCKET_WIDTHS,
+        index=len(insights.BUCKET_WIDTHS) - 1,
+        horizontal=True,
+        key="bucket_width",
+    )
+    hourly_frequency_df = insights.bin_minutes(counts["minutes"], width)
+
+    st.write("Hourly frequency:")
+    st.table(hourly_frequency_df.reset_index(drop=True))
+
+    show_chart(insight_charts["hourly"], images and images["hourly"])
+
+    max_frequency = hourly_frequency_df["Frequency"].max()
+    highest_frequency_hours = hourly_frequency_df.loc[
+        hourly_frequency_df["Frequency"] == max_frequency, "Hour Section"
+    ]
+
+    st.write("Hour section(s) with the highest frequency:")
+    for hour in highest_frequency_hours:
+        st.write(f"{hour} : ({max_frequency})")
+
+    total_frequency = hourly_frequency_df["Frequency"].sum()
+    chance = max_frequency / total_frequency * 100
+    st.write(f"Chance of doing the task during {hour}: {chance:.2f}%")
+    st.write("-" * 30)
+
+
+@perf.timed
+def display_comparison(clean_counts, raw_counts):
+    # Both tables' counts come from the shared counts cache, so comparing
+    # reuses the aggregates the single-table views already hold
+    if clean_counts is None or raw_counts is None:
+        return
+    clean_total = clean_counts["daily"].sum()
+    raw_total = raw_counts["daily"].sum()
+    st.write(
+        f"Total number of entries: {clean_total} cleaned, {raw_total} raw "
+        f"({raw_total - clean_total} more in raw data)"
+    )
+    st.write("-" * 30)
+
+    monthly = compare_counts(clean_counts["monthly"], raw_counts["monthly"])
+    monthly.index = monthly.index.astype(str)
+    st.write("Entries for each month and year:")
+    st.dataframe(monthly)
+    st.line_chart(monthly[["Cleaned", "Raw"]])
+    st.write("-" * 30)
+
+    left, right = st.columns(2)
+    left.write("Days of the week:")
+    left.dataframe(compare_counts(clean_counts["weekday"], raw_counts["weekday"]))
+    hourly = compare_counts(
+        insights.bin_minutes(clean_counts["minutes"]).set_index("Hour Section")[
+            "Frequency"
+        ],
+        insights.bin_minutes(raw_counts["minutes"]).set_index("Hour Section")[
+            "Frequency"
+        ],
+    )
+    right.write("Hourly frequency:")
+    right.dataframe(hourly)
+    st.write("-" * 30)
+
+
+def compare_counts(clean, raw):
+    table = pd.concat({"Cleaned": clean, "Raw": raw}, axis=1, sort=False)
+    table = table.fillna(0).astype("int64")
+    table["Difference"] = table["Raw"] - table["Cleaned"]
+    return table
+
+
+def show():
+    st.header("Analysis")
+    data_type = st.radio("Select data type:", ("Cleaned Data", "Raw Data", "Compare"))
+    source = snapshot_source()
+    filters = analysis_filters()
+    st.write("-" * 30)
+
+    if data_type == "Compare":
+        display_comparison(
+            fetch_counts("Cleaned Data", filters, source),
+            fetch_counts("Raw Data", filters, source),
+        )
+        counts = None
+    else:
+        counts = fetch_counts(data_type, filters, source)
+        total_rows(counts)
+    # The full table is only fetched when asked for
+    if counts is not None and st.checkbox("Show all the data in table"):
+        df = fetch_data(data_type, filters, source)
+        if df is not None:
+            st.write("### All the data in table:")
+            st.write(df)
+            csv_file = db.legacy_frame(df).to_csv(index=False).encode("utf-8")
+            st.download_button(
+                label="Download CSV",
+                data=csv_file,
+                file_name="data.csv",
+                mime="text/csv",
+            )
+    st.write("-" * 30)
+
+    if counts is not None:
+        native_charts = st.toggle(
+            "Interactive charts", value=CHART_MODE == "native", key="native_charts"
+        )
+        display_insights(counts, native_charts)
+
+    st.sidebar.markdown("### Project Description")
+    st.sidebar.markdown(
+        """
+    This application analyzes timestamp data fetched from a MySQL database. 
+
+The data collection process began on October 26, 2019, and is ongoing. This data records the number of times push-ups were done each day.
+
+The cleaned data does not include data from October 2019, August 2023, and September 2023 due to miscalculations during that period. Raw data contains all available data.
+
+Raw data and cleaned data are separated to ensure accuracy during analysis.
+
+The application provides the following insights:
+- **Monthly Counts:** Total number of entries for each month and year.
+- **Average Monthly Counts:** Average count for each month.
+- **Date with Highest Count:** Date(s) with the highest number of entries.
+- **Frequency with User Input:** Display dates with a specific frequency as entered by the user.
+- **Days with Frequency:** Frequency of entries for each day of the week.
+- **Hourly Frequency:** Frequency of entries for each hour of the day.
+
+Use **Filters** to limit the insights to a period, days of the week or hours, and **Compare** to see cleaned and raw data side by side.
+    """
+    )
@@ -0,0 +1,347 @@
+"""Apply a saved Data Cleaner recipe to many files without the UI.
+
+    python batch_clean.py recipe.json INPUT [INPUT ...] --output-dir DIR
+        [--workers N] [--large] [--memory-budget MB]
+        [--dropped-dir DIR] [--dedup-across-sheets]
+
+INPUT is a CSV/XLS/XLSX file or a directory, which is searched for such files.
+The recipe is the JSON downloaded from the Data Cleaner ("Download Cleaning
+Recipe"). It runs on every sheet, each sheet as its own task in a process
+pool. Outputs are written as <name>_cleaned.csv / <name>_cleaned.xlsx, first
+to a temporary file that is renamed into place, so a crash never leaves a
+partial output behind. Files found in a directory keep their path below it,
+so in/2024/export.csv is written to DIR/2024/export_cleaned.csv. A file whose
+output would overwrite another input's fails instead. A per-file summary is
+printed at the end.
+
+CSVs larger than --memory-budget are streamed in chunks instead of loaded,
+when the recipe allows it (see pipeline.streamable); a final sort then runs
+as an external merge sort within the same budget.
+
+With --dropped-dir, rows removed as duplicates are written the same way to
+<name>_duplicates.csv (with a Sheet column for workbooks).
+--dedup-across-sheets treats a row as a duplicate of a row in an earlier
+sheet of the same workbook, so the workbook runs as one task.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+
+import export
+import ingest
+import pipeline
+
+EXTENSIONS = (".csv", ".xls", ".xlsx")
+
+
+def find_inputs(paths):
+    # {path: name}, where name is the path below the INPUT directory it was
+    # found in (the file name for files given directly); outputs mirror it
+    files = {}
+    for path in paths:
+        if os.path.isdir(path):
+            for root, directories, names in os.walk(path):
+                directories.sort()
+                for name in sorted(names):
+                    if name.lower().endswith(EXTENSIONS):
+                        found = os.path.join(root, name)
+                        files[found] = os.path.relpath(found, path)
+        else:
+            files[path] = os.path.basename(path)
+    return files
+
+
+def output_path(name, output_dir, suffix="cleaned"):
+    stem = os.path.basename(name).rsplit(".", 1)[0]
+    extension = "xlsx" if ingest.is_excel(name) and suffix == "cleaned" else "csv"
+    return os.path.join(
+        output_dir, os.path.dirname(name), f"{stem}_{suffix}.{extension}"
+    )
+
+
+def clean_sheets(path, sheet_names, recipe_json, chunked, keep_dropped):
+    # One task: the given sheets in order, sharing duplicate state
+    started = time.perf_counter()
+    with open(path, "rb") as f:
+        data = f.read()
+    recipe = pipeline.Pipeline.from_json(recipe_json)
+    dropped = []
+    deduplicators = recipe.deduplicators(dropped.append if keep_dropped else None)
+    result = {"sheets": {}, "dropped": {}, "rows_in": 0, "rows_out": 0}
+    for sheet_name in sheet_names:
+        df = ingest.read_sheet(data, os.path.basename(path), sheet_name, chunked)
+        result["rows_in"] += len(df)
+        df = recipe.run(df, deduplicators=deduplicators)
+        result["rows_out"] += len(df)
+        result["sheets"][sheet_name] = df
+        if dropped:
+            result["dropped"][sheet_name] = pd.concat(dropped)
+            dropped.clear()
+    result["duplicates"] = sum(d.removed for d in deduplicators.values())
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def clean_csv_streaming(path, recipe_json, output, memory_budget, dropped_output):
+    # Whole-file task: read, clean and write chunk by chunk
+    started = time.perf_counter()
+    result = {"rows_in": 0, "rows_out": 0}
+
+    def chunks():
+        for chunk in pd.read_csv(path, chunksize=ingest.CHUNK_SIZE):
+            result["rows_in"] += len(chunk)
+            yield chunk
+
+    with atomic_open(output) as f, (
+        atomic_open(dropped_output) if dropped_output else nullcontext()
+    ) as dropped_file:
+        dropped_header = [True]
+
+        def write_dropped(dropped):
+            dropped.to_csv(dropped_file, index=False, header=dropped_header[0])
+            dropped_header[0] = False
+
+        recipe = pipeline.Pipeline.from_json(recipe_json)
+        deduplicators = recipe.deduplicators(write_dropped if dropped_file else None)
+        header = True
+        for chunk in recipe.run_chunks(chunks(), memory_budget, deduplicators):
+            chunk.to_csv(f, index=False, header=header)
+            result["rows_out"] += len(chunk)
+            header = False
+    result["duplicates"] = sum(d.removed for d in deduplicators.values())
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def write_sheets(path, sheets):
+    with atomic_open(path) as f:
+        if ingest.is_excel(path):
+            with pd.ExcelWriter(f, engine=export.EXCEL_ENGINE) as writer:
+                for sheet_name, sheet_df in sheets.items():
+                    sheet_df.to_excel(writer, sheet_name=sheet_name, index=False)
+        else:
+            next(iter(sheets.values())).to_csv(f, index=False)
+
+
+def write_dropped(path, source, dropped):
+    with atomic_open(path) as f:
+        if ingest.is_excel(source):
+            frames = [df.assign(Sheet=sheet_name) for sheet_name, df in dropped.items()]
+            df = pd.concat(frames, ignore_index=True)
+            df.insert(0, "Sheet", df.pop("Sheet"))
+        else:
+            df = next(iter(dropped.values()))
+        df.to_csv(f, index=False)
+
+
+@contextmanager
+def atomic_open(path):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(
+        dir=directory, prefix=".tmp-", suffix=os.path.splitext(path)[1]
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file owner-only; outputs should be readable
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def run_batch(
+    files,
+    recipe_json,
+    output_dir,
+    workers=None,
+    chunked=False,
+    memory_budget=pipeline.SORT_MEMORY_BUDGET,
+    dropped_dir=None,
+    across_sheets=False,
+):
+    results = {
+        path: {
+            "sheets": {},
+            "dropped": {},
+            "rows_in": 0,
+            "rows_out": 0,
+            "duplicates": 0,
+            "seconds": 0.0,
+        }
+        for path in files
+    }
+    pending, order, claimed = {}, {}, {}
+    streamable = pipeline.Pipeline.from_json(recipe_json).streamable()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for path, name in files.items():
+            outputs = [output_path(name, output_dir)]
+            if dropped_dir is not None:
+                outputs.append(output_path(name, dropped_dir, "duplicates"))
+            clashes = [claimed[output] for output in outputs if output in claimed]
+            if clashes:
+                results[path]["error"] = f"same output as {clashes[0]}"
+                continue
+            claimed.update((output, path) for output in outputs)
+            if (
+                streamable
+                and not ingest.is_excel(path)
+                and os.path.getsize(path) > memory_budget
+            ):
+                future = executor.submit(
+                    clean_csv_streaming,
+                    path,
+                    recipe_json,
+                    outputs[0],
+                    memory_budget,
+                    outputs[1] if dropped_dir is not None else None,
+                )
+                futures[future] = path
+                pending[path] = 1
+                continue
+            try:
+                with open(path, "rb") as f:
+                    sheet_names = ingest.sheet_names(f.read(), path)
+            except Exception as e:
+                results[path]["error"] = str(e)
+                continue
+            order[path] = sheet_names
+            if across_sheets:
+                tasks = [sheet_names]
+            else:
+                tasks = [[sheet_name] for sheet_name in sheet_names]
+            pending[path] = len(tasks)
+            for task in tasks:
+                future = executor.submit(
+                    clean_sheets,
+                    path,
+                    task,
+                    recipe_json,
+                    chunked,
+                    dropped_dir is not None,
+                )
+                futures[future] = path
+
+        for future in as_completed(futures):
+            path = futures[future]
+            result = results[path]
+            try:
+                done = future.result()
+            except Exception as e:
+                result.setdefault("error", str(e))
+            else:
+                result["sheets"].update(done.pop("sheets", {}))
+                result["dropped"].update(done.pop("dropped", {}))
+                for key, value in done.items():
+                    result[key] += value
+            pending[path] -= 1
+            # Streamed files were written by their task
+            if pending[path] or "error" in result or path not in order:
+                continue
+            started = time.perf_counter()
+            try:
+                # Keep the workbook's sheet order, not completion order
+                cleaned = result.pop("sheets")
+                write_sheets(
+                    output_path(files[path], output_dir),
+                    {sheet_name: cleaned[sheet_name] for sheet_name in order[path]},
+                )
+                dropped = result.pop("dropped")
+                if dropped:
+                    write_dropped(
+                        output_path(files[path], dropped_dir, "duplicates"),
+                        path,
+                        dropped,
+                    )
+            except Exception as e:
+                result["error"] = f"write: {e}"
+            result["seconds"] += time.perf_counter() - started
+    return results
+
+
+def print_summary(results):
+    width = max([len(path) for path in results] + [4])
+    print(
+        f"{'File':<{width}}  {'Rows in':>10}  {'Rows out':>10}  "
+        f"{'Duplicates':>10}  {'Seconds':>8}"
+    )
+    for path, result in results.items():
+        if "error" in result:
+            print(f"{path:<{width}}  FAILED: {result['error']}")
+            continue
+        print(
+            f"{path:<{width}}  {result['rows_in']:>10}  {result['rows_out']:>10}  "
+            f"{result['duplicates']:>10}  {result['seconds']:>8.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recipe", help="recipe JSON saved from the Data Cleaner")
+    parser.add_argument("inputs", nargs="+", help="files or directories")
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--large", action="store_true", help="read files in Large file mode"
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        default=pipeline.SORT_MEMORY_BUDGET // 1024**2,
+        help="MB; larger CSVs are streamed and sorted externally",
+    )
+    parser.add_argument(
+        "--dropped-dir", help="write rows removed as duplicates to this directory"
+    )
+    parser.add_argument(
+        "--dedup-across-sheets",
+        action="store_true",
+        help="remove rows that duplicate a row in an earlier sheet",
+    )
+    args = parser.parse_args()
+
+    with open(args.recipe) as f:
+        recipe_json = f.read()
+    # Fail on a bad recipe before starting any workers
+    pipeline.Pipeline.from_json(recipe_json)
+    files = find_inputs(args.inputs)
+    if not files:
+        parser.error("no CSV/XLS/XLSX inputs found")
+    os.makedirs(args.output_dir, exist_ok=True)
+    if args.dropped_dir:
+        os.makedirs(args.dropped_dir, exist_ok=True)
+
+    started = time.perf_counter()
+    results = run_batch(
+        files,
+        recipe_json,
+        args.output_dir,
+        args.workers,
+        args.large,
+        args.memory_budget * 1024**2,
+        args.dropped_dir,
+        args.dedup_across_sheets,
+    )
+    print_summary(results)
+    failed = sum("error" in result for result in results.values())
+    print(
+        f"{len(files) - failed}/{len(files)} files cleaned in "
+        f"{time.perf_counter() - started:.2f}s"
+    )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
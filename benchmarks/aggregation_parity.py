@@ -0,0 +1,97 @@
+"""Check that the SQL, pandas and rollup aggregation engines agree; time them.
+
+    python benchmarks/aggregation_parity.py --rows 200000
+
+Random timestamps (including ones near midnight IST, where the UTC date
+differs) are written to a throwaway SQLite database. Every insight is then
+computed with insights.query_counts and insights.compute_counts, and from
+the daily_rollup rows (insights.query_rollup), which hold hours rather than
+minutes and are compared on hourly buckets.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+import insights  # noqa: E402
+
+
+def generate(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2019-10-26").value
+    end = pd.Timestamp("2024-06-30").value
+    moments = np.sort(rng.integers(start, end, rows)).astype("datetime64[ns]")
+    return pd.Series(moments).dt.floor("s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    timestamps = generate(args.rows, args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = db.create_pool("sqlite", sqlite_path=os.path.join(tmp, "parity.db"))
+        with pool.connection() as conn, db.cursor(conn) as cursor:
+            cursor.executemany(
+                "INSERT INTO clean_data (Timestamp) VALUES (%s)",
+                [(moment.to_pydatetime(),) for moment in timestamps],
+            )
+            cursor.commit()
+
+            start = time.perf_counter()
+            sql_counts = insights.query_counts(cursor, "clean_data", pool.backend)
+            sql_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            cursor.execute("SELECT ID, Timestamp FROM clean_data")
+            df = pd.DataFrame(cursor.fetchall(), columns=["ID", "Timestamp"])
+            df["Timestamp"] = db.to_local(df["Timestamp"])
+            pandas_counts = insights.compute_counts(insights.build_features(df))
+            pandas_seconds = time.perf_counter() - start
+
+            db.rebuild_rollup(cursor, "clean_data")
+            cursor.commit()
+            start = time.perf_counter()
+            rollup_counts = insights.query_rollup(cursor, "clean_data")
+            rollup_seconds = time.perf_counter() - start
+        pool.close()
+
+    mismatches = 0
+    for insight in insights.INSIGHTS:
+        try:
+            pd.testing.assert_series_equal(sql_counts[insight], pandas_counts[insight])
+            print(f"{insight:8s} ok ({len(sql_counts[insight])} buckets)")
+        except AssertionError as e:
+            mismatches += 1
+            print(f"{insight:8s} MISMATCH\n{e}")
+    for insight in insights.INSIGHTS:
+        expected, actual = sql_counts[insight], rollup_counts[insight]
+        if insight == "minutes":
+            expected = insights.bin_minutes(expected)["Frequency"]
+            actual = insights.bin_minutes(actual)["Frequency"]
+        try:
+            pd.testing.assert_series_equal(actual, expected)
+            print(f"{insight:8s} rollup ok")
+        except AssertionError as e:
+            mismatches += 1
+            print(f"{insight:8s} rollup MISMATCH\n{e}")
+
+    print(f"sql engine:    {sql_seconds:.3f}s")
+    print(f"pandas engine: {pandas_seconds:.3f}s (fetch + aggregate)")
+    print(f"rollup engine: {rollup_seconds:.3f}s")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Micro-benchmark: pyplot insight charts vs the charts.ChartCache service.
+
+    python benchmarks/chart_rendering.py --reruns 10
+
+The legacy path is what every Analysis rerun did before: four plt.figure()
+bar charts on the global pyplot state, never closed. The service renders
+the same four charts as standalone Figures, then serves reruns from the PNG
+cache.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import charts  # noqa: E402
+
+
+def sample_charts():
+    hours = [f"{hour:02d}:00 to {hour + 1:02d}:00" for hour in range(24)]
+    months = [f"2023-{month:02d}" for month in range(1, 13)] * 4
+    return {
+        "monthly": charts.BarChart(
+            "Monthly", "Month", "Entries", tuple(months), tuple(range(48)), 90
+        ),
+        "monthly_avg": charts.BarChart(
+            "Average", "Month", "Average", tuple(months[:12]), tuple(range(12)), 45
+        ),
+        "weekday": charts.BarChart(
+            "Weekday", "Day", "Frequency", tuple("MTWTFSS"), tuple(range(7)), 45
+        ),
+        "hourly": charts.BarChart(
+            "Hourly", "Hour", "Frequency", tuple(hours), tuple(range(24)), 45, "right"
+        ),
+    }
+
+
+def legacy_render(insight_charts):
+    for chart in insight_charts.values():
+        plt.figure(figsize=(10, 6))
+        plt.bar([str(label) for label in chart.labels], chart.values)
+        plt.title(chart.title)
+        plt.savefig(os.devnull, format="png")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=10)
+    args = parser.parse_args()
+    insight_charts = sample_charts()
+
+    start = time.perf_counter()
+    for _ in range(args.reruns):
+        legacy_render(insight_charts)
+    legacy_seconds = time.perf_counter() - start
+    open_figures = len(plt.get_fignums())
+    plt.close("all")
+
+    cache = charts.ChartCache()
+    start = time.perf_counter()
+    cache.render(insight_charts)
+    cold_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(args.reruns):
+        cache.render(insight_charts)
+    warm_seconds = time.perf_counter() - start
+
+    print(f"reruns:                       {args.reruns}")
+    print(f"legacy pyplot, per rerun:     {legacy_seconds / args.reruns:.3f}s")
+    print(f"legacy figures left open:     {open_figures}")
+    print(f"service, cold:                {cold_seconds:.3f}s")
+    print(f"service cached, per rerun:    {warm_seconds / args.reruns * 1000:.2f}ms")
+    print(f"pyplot figures after service: {len(plt.get_fignums())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Fire many parallel saves at a database and check that no IDs collide.
+
+    python benchmarks/concurrent_saves.py --saves 500 --workers 32
+    python benchmarks/concurrent_saves.py --backend mysql
+    python benchmarks/concurrent_saves.py --write-behind
+
+The SQLite run uses a throwaway file; the MySQL run writes real rows into the
+configured database, so point it at a scratch schema.
+
+--write-behind saves through the local queue the Timestamp page uses, then
+waits for the background writer to drain it and writes every batch a second
+time to check that the event IDs keep it from being inserted twice.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+import writebehind  # noqa: E402
+
+
+def moment(i):
+    return datetime(2024, 1, 1, i % 24, tzinfo=timezone.utc)
+
+
+def save(pool, i):
+    with pool.connection() as conn, db.cursor(conn) as db_cursor:
+        db.insert_entry(db_cursor, moment(i))
+    return db_cursor.round_trips
+
+
+def save_behind(writer, i):
+    start = time.perf_counter()
+    event_id = writer.save(moment(i))
+    return time.perf_counter() - start, (event_id, db.to_storage(moment(i)))
+
+
+def drain(writer, timeout=60):
+    deadline = time.perf_counter() + timeout
+    while writer.pending() and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    return writer.pending() == 0
+
+
+def replay(pool, events):
+    # Rewriting events that were already flushed must not add any rows
+    with pool.connection() as conn, db.cursor(conn) as db_cursor:
+        return sum(
+            db.insert_events(db_cursor, events[start : start + writebehind.FLUSH_BATCH])
+            for start in range(0, len(events), writebehind.FLUSH_BATCH)
+        )
+
+
+def rollup_total(pool, table_name):
+    with pool.connection() as conn, db.cursor(conn) as db_cursor:
+        db_cursor.execute(
+            f"SELECT SUM(Count) FROM {db.ROLLUP_TABLE} WHERE TableName = %s",
+            (table_name,),
+        )
+        return db_cursor.fetchone()[0] or 0
+
+
+def ids(pool, table_name):
+    with pool.connection() as conn, db.cursor(conn) as db_cursor:
+        db_cursor.execute(f"SELECT ID FROM {table_name}")
+        return [row[0] for row in db_cursor.fetchall()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--saves", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--backend", default="sqlite", choices=["sqlite", "mysql"])
+    parser.add_argument(
+        "--write-behind", action="store_true", help="save through the local queue"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = db.create_pool(
+            args.backend,
+            sqlite_path=os.path.join(tmp, "bench.db"),
+            size=min(args.workers, 16),
+        )
+        before = {table: set(ids(pool, table)) for table in ("clean_data", "raw_data")}
+        rolled_up = {table: rollup_total(pool, table) for table in before}
+
+        ok = True
+        start = time.perf_counter()
+        if args.write_behind:
+            queue = writebehind.EventQueue(os.path.join(tmp, "queue.db"))
+            writer = writebehind.EventWriter(pool, queue)
+            with ThreadPoolExecutor(max_workers=args.workers) as executor:
+                latencies, events = zip(
+                    *executor.map(lambda i: save_behind(writer, i), range(args.saves))
+                )
+            ok = drain(writer)
+            elapsed = time.perf_counter() - start
+            replayed = replay(pool, list(events))
+            print(f"replayed {len(events)} flushed events: {replayed} written again")
+            ok = ok and replayed == 0
+            writer.close()
+        else:
+            with ThreadPoolExecutor(max_workers=args.workers) as executor:
+                round_trips = list(
+                    executor.map(lambda i: save(pool, i), range(args.saves))
+                )
+            elapsed = time.perf_counter() - start
+
+        for table, old_ids in before.items():
+            new_ids = [i for i in ids(pool, table) if i not in old_ids]
+            unique = len(set(new_ids))
+            print(f"{table}: {len(new_ids)} new rows, {unique} unique IDs")
+            ok = ok and len(new_ids) == unique == args.saves
+            # Every save must also have been counted in the rollup
+            counted = rollup_total(pool, table) - rolled_up[table]
+            print(f"{table}: {counted} saves counted in {db.ROLLUP_TABLE}")
+            ok = ok and counted == args.saves
+        pool.close()
+
+    if args.write_behind:
+        latencies = sorted(latencies)
+        print(
+            f"{args.saves} saves written in {elapsed:.2f}s "
+            f"({args.saves / elapsed:.0f}/s); save() took "
+            f"{latencies[len(latencies) // 2] * 1000:.2f} ms median, "
+            f"{latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms p99"
+        )
+    else:
+        print(
+            f"{args.saves} saves in {elapsed:.2f}s "
+            f"({args.saves / elapsed:.0f}/s, "
+            f"{sum(round_trips) / len(round_trips):.0f} round trips per save)"
+        )
+    if not ok:
+        print("ID collision, lost save or rollup drift detected")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
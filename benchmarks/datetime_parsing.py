@@ -0,0 +1,70 @@
+"""Per-render parse cost of legacy Date/Time strings vs the Timestamp column.
+
+    python benchmarks/datetime_parsing.py --rows 3000000
+
+The legacy path repeats what the Analysis insights did on every render: four
+pd.to_datetime calls on Date and one on Time. The native path converts the
+DATETIME values the driver returns (already datetime objects) to IST once.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+
+
+def generate(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2019-10-26").value
+    end = pd.Timestamp("2024-06-30").value
+    moments = np.sort(rng.integers(start, end, rows)).astype("datetime64[ns]")
+    return pd.Series(moments).dt.floor("min")
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    utc = generate(args.rows)
+    legacy = db.legacy_frame(
+        pd.DataFrame({"ID": np.arange(args.rows), "Timestamp": db.to_local(utc)})
+    )
+    # What the DATETIME column looks like coming out of the driver
+    driver_values = utc.astype(object)
+
+    def legacy_render():
+        for _ in range(4):
+            pd.to_datetime(legacy["Date"])
+        pd.to_datetime(legacy["Time"], errors="coerce", format="%I:%M %p")
+
+    def native_render():
+        db.to_local(driver_values).dt.tz_localize(None)
+
+    legacy_seconds = timed(legacy_render, args.repeat)
+    native_seconds = timed(native_render, args.repeat)
+    print(f"rows:            {args.rows:,}")
+    print(f"legacy parsing:  {legacy_seconds:.3f}s per render")
+    print(f"native datetime: {native_seconds:.3f}s per render")
+    print(f"saved:           {legacy_seconds - native_seconds:.3f}s per render")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Memory and time report: legacy in-place insight prep vs the feature frame.
+
+    python benchmarks/feature_frame.py --rows 2000000
+
+The legacy path replays what the display_* insights used to do to the fetched
+frame: each one re-parsed Date/Time strings and added or overwrote
+Month_Year, Date and Time. The new path builds insights.build_features once
+and derives every count from it with insights.compute_counts.
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+import insights  # noqa: E402
+
+
+def legacy_prep(df):
+    df["Month_Year"] = pd.to_datetime(df["Date"]).dt.to_period("M")
+    df["Month_Year"].value_counts()
+    df["Month_Year"] = pd.to_datetime(df["Date"]).dt.to_period("M")
+    df["Month_Year"].value_counts()
+    df["Date"] = pd.to_datetime(df["Date"])
+    df["Date"].value_counts()
+    df["Date"].value_counts()
+    df["Date"] = pd.to_datetime(df["Date"])
+    df["Date"].dt.day_name().value_counts()
+    df["Time"] = pd.to_datetime(df["Time"], errors="coerce", format="%I:%M %p")
+    df["Time"].dt.hour.value_counts()
+    return df
+
+
+def megabytes(df):
+    return df.memory_usage(deep=True).sum() / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    start = pd.Timestamp("2019-10-26").value
+    end = pd.Timestamp("2024-06-30").value
+    moments = np.sort(rng.integers(start, end, args.rows)).astype("datetime64[ns]")
+    events = pd.DataFrame(
+        {
+            "ID": np.arange(1, args.rows + 1),
+            "Timestamp": db.to_local(pd.Series(moments).dt.floor("min")),
+        }
+    )
+    legacy = db.legacy_frame(events)
+
+    legacy_before = megabytes(legacy)
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    legacy = legacy_prep(legacy)
+    legacy_seconds = time.perf_counter() - start_time
+    legacy_peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    legacy_after = megabytes(legacy)
+
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    features = insights.build_features(events)
+    build_seconds = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    insights.compute_counts(features)
+    count_seconds = time.perf_counter() - start_time
+    features_peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+
+    print(f"rows: {args.rows:,}")
+    print(
+        f"legacy:   {legacy_seconds:.3f}s, frame {legacy_before:.1f} MB "
+        f"-> {legacy_after:.1f} MB, peak allocation {legacy_peak:.1f} MB"
+    )
+    print(
+        f"features: {build_seconds:.3f}s build + {count_seconds:.3f}s counts, "
+        f"frame {megabytes(features):.1f} MB, peak allocation {features_peak:.1f} MB"
+    )
+    for column, dtype in features.dtypes.items():
+        print(f"  {column:8s} {dtype}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Synthetic data for the benchmarks: timestamp tables and messy spreadsheets.
+
+    python benchmarks/generators.py events timestamps.db --rows 1000000
+    python benchmarks/generators.py events legacy.db --rows 100000 --legacy
+    python benchmarks/generators.py sheet messy.xlsx --rows 50000
+
+Events follow the real tables: push-up sessions from 26 October 2019 on,
+mostly in the morning and evening (IST), with clean_data missing October
+2019, August 2023 and September 2023. --legacy writes the old Date/Time
+string columns instead (for "migrate.py datetime"), SQLite only.
+
+Sheets mimic what people upload: inconsistent casing and padding, repeated
+categories, numbers stored as text, "NULL"/"n/a" placeholders, blank cells,
+accented names and exact duplicate rows. The same seed gives the same data.
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+
+EVENTS_START = "2019-10-26"
+EVENTS_END = "2024-06-30"
+# Local months (yyyymm) left out of clean_data, as the Analysis page describes
+CLEAN_EXCLUDED_MONTHS = (201910, 202308, 202309)
+# Relative chance of a session starting in each local hour
+HOUR_WEIGHTS = np.array(
+    [1, 1, 1, 1, 1, 2, 6, 10, 8, 4, 3, 3, 3, 3, 3, 3, 4, 6, 9, 10, 8, 5, 3, 2],
+    dtype="float64",
+)
+INSERT_CHUNK = 100_000
+
+FIRST_NAMES = ["John", "alice", "BOB", "María", "Zoë", "li", "Ana", "José"]
+LAST_NAMES = ["Doe", "smith", "O'Brien", "Müller", "NGUYEN", "garcía", "Lee"]
+CITIES = ["New York", "new york", "London", "london ", "Paris", "São Paulo"]
+MISSING = ["NULL", "n/a", "", None]
+
+
+def event_timestamps(rows, seed=0):
+    # Sorted naive UTC datetimes, the way the Timestamp column stores them
+    rng = np.random.default_rng(seed)
+    days = pd.date_range(EVENTS_START, EVENTS_END, freq="D").to_numpy()
+    day = rng.integers(0, len(days), rows)
+    hour = rng.choice(24, rows, p=HOUR_WEIGHTS / HOUR_WEIGHTS.sum())
+    second = rng.integers(0, 3600, rows)
+    local = np.sort(
+        days[day] + hour.astype("timedelta64[h]") + second.astype("timedelta64[s]")
+    )
+    return (
+        pd.Series(local)
+        .dt.tz_localize(db.LOCAL_TIMEZONE)
+        .dt.tz_convert("UTC")
+        .dt.tz_localize(None)
+    )
+
+
+def clean_mask(timestamps):
+    local = db.to_local(timestamps)
+    month = local.dt.year * 100 + local.dt.month
+    return ~month.isin(CLEAN_EXCLUDED_MONTHS).to_numpy()
+
+
+def write_events(db_cursor, timestamps):
+    # Replaces both tables' rows (and their rollup) with the given events
+    tables = {
+        "raw_data": timestamps,
+        "clean_data": timestamps[clean_mask(timestamps)],
+    }
+    for table_name, values in tables.items():
+        db_cursor.execute(f"DELETE FROM {table_name}")
+        # Whole-second datetime64 values become datetime.datetime objects
+        values = values.to_numpy().astype("datetime64[s]").astype(object)
+        for start in range(0, len(values), INSERT_CHUNK):
+            db_cursor.executemany(
+                f"INSERT INTO {table_name} (Timestamp) VALUES (%s)",
+                [(value,) for value in values[start : start + INSERT_CHUNK]],
+            )
+        db.rebuild_rollup(db_cursor, table_name)
+        db_cursor.commit()
+
+
+def write_legacy_events(path, timestamps):
+    # Pre-migration schema: Date/Time strings in IST
+    conn = sqlite3.connect(path)
+    tables = {
+        "raw_data": timestamps,
+        "clean_data": timestamps[clean_mask(timestamps)],
+    }
+    for table_name, values in tables.items():
+        legacy = db.legacy_frame(
+            pd.DataFrame({"ID": range(1, len(values) + 1), "Timestamp": values}).assign(
+                Timestamp=lambda df: db.to_local(df["Timestamp"])
+            )
+        )
+        conn.execute(f"DROP TABLE IF EXISTS {table_name}")
+        conn.execute(
+            f"CREATE TABLE {table_name} "
+            "(ID INTEGER PRIMARY KEY AUTOINCREMENT, Date TEXT, Time TEXT)"
+        )
+        conn.executemany(
+            f"INSERT INTO {table_name} (Date, Time) VALUES (?, ?)",
+            legacy[["Date", "Time"]].itertuples(index=False),
+        )
+    conn.commit()
+    conn.close()
+
+
+def messy_frame(rows, seed=0, duplicate_share=0.1, missing_share=0.05):
+    rng = np.random.default_rng(seed)
+    unique_rows = max(1, int(rows * (1 - duplicate_share)))
+
+    def pick(values, size):
+        return np.asarray(values, dtype=object)[rng.integers(0, len(values), size)]
+
+    def padded(values):
+        pad = rng.random(len(values)) < 0.1
+        values[pad] = [f" {value} " for value in values[pad]]
+        return values
+
+    names = padded(pick(FIRST_NAMES, unique_rows) + " " + pick(LAST_NAMES, unique_rows))
+    ages = rng.integers(16, 80, unique_rows).astype(object)
+    as_text = rng.random(unique_rows) < 0.2
+    ages[as_text] = ages[as_text].astype(str)
+    df = pd.DataFrame(
+        {
+            "Name": names,
+            "Age": ages,
+            "City": pick(CITIES, unique_rows),
+            "Email": [
+                f"user{i}@Example.com" for i in rng.integers(0, rows, unique_rows)
+            ],
+            "Joined": pd.Timestamp("2015-01-01")
+            + pd.to_timedelta(rng.integers(0, 3650, unique_rows), unit="D"),
+            "Score": np.round(rng.normal(70, 15, unique_rows), 2),
+            "Notes": pick(
+                ["ok", "Follow up", "VIP", "late payment", "ÉCOLE"], unique_rows
+            ),
+        }
+    )
+    for column in ("Name", "Age", "City", "Notes"):
+        blank = rng.random(unique_rows) < missing_share
+        df[column] = df[column].astype(object)
+        df.loc[blank, column] = pick(MISSING, int(blank.sum()))
+    duplicates = df.iloc[rng.integers(0, unique_rows, rows - unique_rows)]
+    df = pd.concat([df, duplicates], ignore_index=True)
+    return df.iloc[rng.permutation(len(df))].reset_index(drop=True)
+
+
+def write_messy(path, rows, seed=0, sheets=2):
+    # CSV gets one frame; workbooks get `sheets` sheets of `rows` rows each
+    if not path.lower().endswith((".xls", ".xlsx")):
+        messy_frame(rows, seed).to_csv(path, index=False)
+        return
+    with pd.ExcelWriter(path) as writer:
+        for sheet in range(sheets):
+            messy_frame(rows, seed + sheet).to_excel(
+                writer, sheet_name=f"Sheet{sheet + 1}", index=False
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    events_parser = commands.add_parser("events", help="SQLite timestamp tables")
+    events_parser.add_argument("path")
+    events_parser.add_argument("--rows", type=int, default=100_000)
+    events_parser.add_argument("--seed", type=int, default=0)
+    events_parser.add_argument(
+        "--legacy", action="store_true", help="write Date/Time string columns"
+    )
+    sheet_parser = commands.add_parser("sheet", help="messy CSV or XLSX")
+    sheet_parser.add_argument("path")
+    sheet_parser.add_argument("--rows", type=int, default=10_000)
+    sheet_parser.add_argument("--seed", type=int, default=0)
+    sheet_parser.add_argument("--sheets", type=int, default=2)
+    args = parser.parse_args()
+
+    if args.command == "sheet":
+        write_messy(args.path, args.rows, args.seed, args.sheets)
+    elif args.legacy:
+        write_legacy_events(args.path, event_timestamps(args.rows, args.seed))
+    else:
+        pool = db.create_pool("sqlite", sqlite_path=args.path)
+        with pool.connection() as conn, db.cursor(conn) as db_cursor:
+            write_events(db_cursor, event_timestamps(args.rows, args.seed))
+        pool.close()
+    print(f"wrote {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Micro-benchmark: the old 24-pass hourly loop vs insights.bin_minutes.
+
+    python benchmarks/hourly_binning.py --rows 1000000
+
+The loop is the display_hourly_frequency body the app used before: one
+boolean .dt.time mask over the whole frame per hour. The new path is a
+single bincount over minute-of-day followed by a reshape per bucket width.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import insights  # noqa: E402
+
+
+def legacy_hourly_frequency(df):
+    df["Time"] = pd.to_datetime(df["Time"], errors="coerce", format="%I:%M %p")
+    df.dropna(subset=["Time"], inplace=True)
+    hourly_frequency = {}
+    for hour in range(0, 24):
+        start_time = pd.to_datetime(f"{hour:02d}:00:00").time()
+        end_time = pd.to_datetime(f"{hour:02d}:59:59").time()
+        filtered_df = df[
+            (df["Time"].dt.time >= start_time) & (df["Time"].dt.time <= end_time)
+        ]
+        hourly_frequency[f"{hour:02d}:00 to {hour+1:02d}:00"] = filtered_df.shape[0]
+    return hourly_frequency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    minutes = rng.integers(0, insights.MINUTES_PER_DAY, args.rows)
+    times = pd.Series(pd.Timestamp("2024-01-01") + pd.to_timedelta(minutes, "min"))
+    legacy = pd.DataFrame({"Time": times.dt.strftime("%I:%M %p").str.lower()})
+
+    start = time.perf_counter()
+    expected = legacy_hourly_frequency(legacy.copy())
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    histogram = insights.minute_histogram(times.dt.hour, times.dt.minute)
+    buckets = insights.bin_minutes(histogram, 60)
+    binned_seconds = time.perf_counter() - start
+    assert list(buckets["Frequency"]) == list(expected.values())
+
+    start = time.perf_counter()
+    for width in insights.BUCKET_WIDTHS:
+        insights.bin_minutes(histogram, width)
+    rebin_seconds = time.perf_counter() - start
+
+    print(f"rows:                  {args.rows:,}")
+    print(f"legacy 24-pass loop:   {legacy_seconds:.3f}s")
+    print(f"minute histogram + 60: {binned_seconds:.3f}s")
+    print(f"rebin 15/30/60:        {rebin_seconds * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
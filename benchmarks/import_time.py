@@ -0,0 +1,110 @@
+"""Cold-start import time of each app page, from python -X importtime.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --before 07f77a4 --output import_time.json
+
+Each run imports app.py and one page module in a fresh interpreter, the way
+Streamlit does when a page is first chosen, and sums the top-level entries
+of the -X importtime report. "All pages" imports every page module of this
+tree; their heavy libraries are still deferred, so it is not the old cost.
+--before REV measures app.py as it was at a git revision, checked out into
+a temporary directory: 07f77a4, the last revision with every page in
+app.py, is the baseline for the split. The heavy libraries each run pulls
+in are listed next to its median.
+"""
+
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app  # noqa: E402
+
+HEAVY_MODULES = ("pandas", "pyarrow", "matplotlib", "mysql.connector", "pytz")
+
+
+def import_report(modules, cwd=ROOT):
+    # {module: cumulative microseconds} for one fresh interpreter
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    report = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            report[name.rstrip()] = int(cumulative)
+    return report
+
+
+def measure(modules, repeat, cwd=ROOT):
+    runs = []
+    for _ in range(repeat):
+        report = import_report(modules, cwd)
+        # Top-level imports have exactly one space after the separator
+        top = sum(us for name, us in report.items() if not name.startswith("  "))
+        runs.append(top / 1000)
+        loaded = {name.strip() for name in report}
+    return {
+        "ms": runs,
+        "median": statistics.median(runs),
+        "heavy": [module for module in HEAVY_MODULES if module in loaded],
+    }
+
+
+def checkout(revision, directory):
+    archive = subprocess.run(
+        ["git", "archive", "--format=tar", revision],
+        cwd=ROOT,
+        capture_output=True,
+        check=True,
+    ).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(directory, filter="data")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--before", metavar="REV", help="also measure app.py at REV")
+    parser.add_argument("--output", help="also write the runs as JSON")
+    args = parser.parse_args()
+
+    targets = {label: ["app", module] for label, module in app.PAGES.items()}
+    targets["All pages"] = ["app", *app.PAGES.values()]
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        if args.before:
+            checkout(args.before, directory)
+        for label, modules in targets.items():
+            results[label] = measure(modules, args.repeat)
+        if args.before:
+            results[f"app.py at {args.before}"] = measure(
+                ["app"], args.repeat, directory
+            )
+    for label, result in results.items():
+        print(
+            f"{label:<22} {result['median']:>8.1f} ms  "
+            f"{', '.join(result['heavy']) or '-'}"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+        print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""Benchmark suite for the app's hot paths, written as JSON for comparison.
+
+    python benchmarks/suite.py --rows 1000 100000 1000000 --output before.json
+    python benchmarks/suite.py --compare before.json after.json
+
+Analysis: synthetic clean_data/raw_data tables (benchmarks/generators.py) of
+each --rows size are loaded into a throwaway SQLite file, or with --backend
+mysql into the configured database (point it at a scratch schema: both
+tables are emptied). Then fetch_data, every counts engine, chart rendering
+and each display_* insight are timed.
+
+Data Cleaner: messy sheets of each --sheet-rows size are read from CSV and
+XLSX, profiled, run through every cleaning step on its own and as one
+recipe, and exported in every download format.
+
+The Analysis page module runs in Streamlit's bare mode, so no server is
+started and the st.* calls draw nothing. Each benchmark runs --repeat times;
+the JSON keeps every run plus min and median, with the commit and library
+versions. --compare prints the median ratio of each benchmark between two
+result files. Startup time per page is measured by benchmarks/import_time.py.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import charts  # noqa: E402
+import db  # noqa: E402
+import export  # noqa: E402
+import generators  # noqa: E402
+import ingest  # noqa: E402
+import insights  # noqa: E402
+import pipeline  # noqa: E402
+import profiling  # noqa: E402
+
+# Larger workbooks take minutes to write and read; Excel caps sheets at ~1M rows
+XLSX_MAX_ROWS = 100_000
+ENGINES = ("rollup", "sql", "pandas")
+
+
+class Suite:
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = []
+
+    def measure(self, group, name, rows, func, setup=None):
+        seconds = []
+        for _ in range(self.repeat):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            func()
+            seconds.append(time.perf_counter() - start)
+        self.results.append(
+            {
+                "group": group,
+                "name": name,
+                "rows": rows,
+                "seconds": seconds,
+                "min": min(seconds),
+                "median": statistics.median(seconds),
+            }
+        )
+        print(f"{group:<8} {name:<36} {rows:>10}  {statistics.median(seconds):>9.4f}s")
+
+
+def load_analysis(backend, sqlite_path):
+    # Bare mode: st.* calls are no-ops, so keep Streamlit's warnings quiet
+    import streamlit.logger
+
+    streamlit.logger.set_log_level(logging.ERROR)
+    import analysis_page
+    import resources
+
+    pool = db.create_pool(backend, sqlite_path=sqlite_path)
+    # The app's shared pool, pointed at the benchmark database
+    resources.get_pool = lambda: pool
+    return analysis_page
+
+
+def bench_analysis(suite, page, rows, seed):
+    pool = page.resources.get_pool()
+    with pool.connection() as conn, db.cursor(conn) as cursor:
+        generators.write_events(cursor, generators.event_timestamps(rows, seed))
+    no_filters = insights.Filters()
+
+    suite.measure(
+        "analysis",
+        "fetch_data",
+        rows,
+        lambda: page.fetch_data("Raw Data", no_filters),
+        setup=page.resources.load_events.clear,
+    )
+    with pool.connection() as conn, db.cursor(conn) as cursor:
+        last_day = insights.query_rollup(cursor, "raw_data")["daily"].index.max()
+        windows = {
+            "": no_filters,
+            ".90_days": insights.Filters(
+                (last_day - pd.Timedelta(days=89)).date(), last_day.date()
+            ),
+        }
+        for engine in ENGINES:
+            for suffix, filters in windows.items():
+                suite.measure(
+                    "analysis",
+                    f"counts.{engine}{suffix}",
+                    rows,
+                    lambda: insights.CountsCache().counts(
+                        cursor, "raw_data", pool.backend, engine, filters
+                    ),
+                )
+        counts = insights.query_counts(cursor, "raw_data", pool.backend)
+        suite.measure(
+            "analysis",
+            "frequency_index",
+            rows,
+            lambda: insights.FrequencyIndex(counts["daily"]),
+        )
+        counts = insights.index_counts(counts)
+        clean_counts = insights.query_counts(cursor, "clean_data", pool.backend)
+
+    insight_charts = page.build_charts(counts, insights.BUCKET_WIDTHS[-1])
+    suite.measure(
+        "analysis",
+        "build_charts",
+        rows,
+        lambda: page.build_charts(counts, insights.BUCKET_WIDTHS[-1]),
+    )
+    suite.measure(
+        "analysis",
+        "render_png",
+        rows,
+        lambda: [charts.render_png(chart) for chart in insight_charts.values()],
+    )
+    images = {name: charts.render_png(chart) for name, chart in insight_charts.items()}
+    displays = {
+        "display_monthly_counts": (counts, insight_charts, images),
+        "display_avg_monthly_counts": (counts, insight_charts, images),
+        "display_date_with_highest_count": (counts,),
+        "display_frequency_with_user_input": (counts,),
+        "display_days_with_frequency": (counts, insight_charts, images),
+        "display_hourly_frequency": (counts, insight_charts, images),
+        "display_comparison": (clean_counts, counts),
+    }
+    for name, args in displays.items():
+        suite.measure("analysis", name, rows, lambda: getattr(page, name)(*args))
+
+
+def bench_cleaner(suite, rows, seed, directory):
+    csv_path = os.path.join(directory, f"messy_{rows}.csv")
+    generators.write_messy(csv_path, rows, seed)
+    with open(csv_path, "rb") as f:
+        csv_data = f.read()
+    sheet = ingest.CSV_SHEET_NAME
+    suite.measure(
+        "cleaner",
+        "read_csv",
+        rows,
+        lambda: ingest.read_sheet(csv_data, "messy.csv", sheet),
+    )
+    suite.measure(
+        "cleaner",
+        "read_csv.large_file_mode",
+        rows,
+        lambda: ingest.read_sheet(csv_data, "messy.csv", sheet, chunked=True),
+    )
+    if rows <= XLSX_MAX_ROWS:
+        xlsx_path = os.path.join(directory, f"messy_{rows}.xlsx")
+        generators.write_messy(xlsx_path, rows, seed, sheets=1)
+        with open(xlsx_path, "rb") as f:
+            xlsx_data = f.read()
+        suite.measure(
+            "cleaner",
+            "read_xlsx",
+            rows,
+            lambda: ingest.read_sheet(xlsx_data, "messy.xlsx", "Sheet1"),
+        )
+
+    df = ingest.read_sheet(csv_data, "messy.csv", sheet)
+    suite.measure("cleaner", "profile", rows, lambda: profiling.profile(df))
+    text = ("Name", "City", "Notes")
+    steps = {
+        "Replace": pipeline.Replace(),
+        "RemoveDuplicates": pipeline.RemoveDuplicates(),
+        "RemoveDuplicates.subset": pipeline.RemoveDuplicates(("Email",)),
+        "RemoveMissing": pipeline.RemoveMissing(),
+        "Lowercase": pipeline.Lowercase(text),
+        "Capitalize": pipeline.Capitalize(text),
+        "DeleteColumns": pipeline.DeleteColumns(("Notes",)),
+        "Sort": pipeline.Sort((("City", True, "last"), ("Score", False, "last"))),
+    }
+    for name, step in steps.items():
+        suite.measure("cleaner", f"step.{name}", rows, lambda: step.apply(df))
+    recipe = pipeline.Pipeline(list(steps.values()))
+    suite.measure("cleaner", "pipeline.all_steps", rows, lambda: recipe.run(df))
+
+    cleaned = recipe.run(df)
+    for export_format in export.FORMATS:
+        if export_format == "xlsx" and rows > XLSX_MAX_ROWS:
+            continue
+        suite.measure(
+            "cleaner",
+            f"export.{export_format}",
+            rows,
+            lambda: export.build(export_format, {sheet: cleaned}, sheet),
+        )
+
+
+def metadata(args):
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import numpy
+    import pyarrow
+
+    return {
+        "commit": commit,
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pandas": pd.__version__,
+        "numpy": numpy.__version__,
+        "pyarrow": pyarrow.__version__,
+        "backend": args.backend,
+        "repeat": args.repeat,
+        "seed": args.seed,
+    }
+
+
+def compare(before_path, after_path, threshold):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    medians = {
+        (result["group"], result["name"], result["rows"]): result["median"]
+        for result in before["results"]
+    }
+    regressions = 0
+    print(f"{before['meta']['commit']} -> {after['meta']['commit']}")
+    for result in after["results"]:
+        key = (result["group"], result["name"], result["rows"])
+        if key not in medians:
+            continue
+        ratio = result["median"] / medians[key] if medians[key] else float("inf")
+        flag = ""
+        if ratio > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(
+            f"{key[0]:<8} {key[1]:<36} {key[2]:>10}  "
+            f"{medians[key]:>9.4f}s -> {result['median']:>9.4f}s  {ratio:5.2f}x{flag}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--rows",
+        type=int,
+        nargs="*",
+        default=[1_000, 10_000, 100_000],
+        help="event table sizes (up to 10M)",
+    )
+    parser.add_argument(
+        "--sheet-rows",
+        type=int,
+        nargs="*",
+        default=[1_000, 10_000, 100_000],
+        help="Data Cleaner sheet sizes",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", default="sqlite", choices=["sqlite", "mysql"])
+    parser.add_argument("--output", help="JSON file (default: suite-<commit>.json)")
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two runs"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.2,
+        help="median ratio reported as a regression by --compare",
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    meta = metadata(args)
+    suite = Suite(args.repeat)
+    with tempfile.TemporaryDirectory() as tmp:
+        page = load_analysis(args.backend, os.path.join(tmp, "bench.db"))
+        for rows in sorted(args.rows):
+            bench_analysis(suite, page, rows, args.seed)
+        page.resources.get_pool().close()
+        for rows in sorted(args.sheet_rows):
+            bench_cleaner(suite, rows, args.seed, tmp)
+
+    output = args.output or f"suite-{(meta['commit'] or 'unknown')[:12]}.json"
+    with open(output, "w") as f:
+        json.dump({"meta": meta, "results": suite.results}, f, indent=1)
+    print(f"wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
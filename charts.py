@@ -0,0 +1,93 @@
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+
+@dataclass(frozen=True)
+class BarChart:
+    # Everything a bar chart is drawn from, so equal specs give equal images
+    title: str
+    xlabel: str
+    ylabel: str
+    labels: tuple
+    values: tuple
+    rotation: int = 0
+    ha: str = "center"
+
+    def key(self):
+        spec = json.dumps(asdict(self), sort_keys=True, default=str)
+        return hashlib.sha256(spec.encode()).hexdigest()
+
+    def vega_lite(self):
+        return {
+            "title": self.title,
+            "mark": "bar",
+            "encoding": {
+                # sort None keeps the given order (months, weekdays, hours)
+                "x": {"field": "label", "type": "nominal", "sort": None},
+                "y": {"field": "value", "type": "quantitative"},
+            },
+        }
+
+    def records(self):
+        return [
+            {"label": str(label), "value": value}
+            for label, value in zip(self.labels, self.values)
+        ]
+
+
+def render_png(chart):
+    # A Figure outside pyplot: no global state shared between sessions and
+    # nothing left registered after rendering, so memory does not grow.
+    # matplotlib is imported on first use: native charts never need it.
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=(10, 6))
+    FigureCanvasAgg(figure)
+    axes = figure.subplots()
+    axes.bar([str(label) for label in chart.labels], chart.values)
+    axes.set_title(chart.title)
+    axes.set_xlabel(chart.xlabel)
+    axes.set_ylabel(chart.ylabel)
+    for label in axes.get_xticklabels():
+        label.set_rotation(chart.rotation)
+        label.set_horizontalalignment(chart.ha)
+    figure.tight_layout()
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+class ChartCache:
+    # Rendered PNGs keyed by BarChart.key(). Charts missing from the cache
+    # are rendered one after another in the calling thread: Agg rendering
+    # holds the GIL, so a thread pool only added overhead.
+
+    def __init__(self, max_entries=64):
+        self._lock = threading.Lock()
+        self._images = OrderedDict()
+        self.max_entries = max_entries
+
+    def render(self, charts):
+        # charts: {name: BarChart}; returns {name: PNG bytes}
+        keys = {name: chart.key() for name, chart in charts.items()}
+        with self._lock:
+            images = {
+                name: self._images[key]
+                for name, key in keys.items()
+                if key in self._images
+            }
+        for name in charts:
+            if name not in images:
+                images[name] = render_png(charts[name])
+        with self._lock:
+            for name, key in keys.items():
+                self._images[key] = images[name]
+                self._images.move_to_end(key)
+            while len(self._images) > self.max_entries:
+                self._images.popitem(last=False)
+        return images
@@ -0,0 +1,356 @@
+import io
+
+import pandas as pd
+import streamlit as st
+
+import export
+import ingest
+import perf
+import pipeline
+import profiling
+
+
+def upload_hash(uploaded_file):
+    # Hash each upload once per session instead of on every rerun
+    hashes = st.session_state.setdefault("upload_hashes", {})
+    if uploaded_file.file_id not in hashes:
+        hashes[uploaded_file.file_id] = ingest.content_hash(uploaded_file.getvalue())
+    return hashes[uploaded_file.file_id]
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def list_sheets(data_hash, file_name, _uploaded_file):
+    return ingest.sheet_names(_uploaded_file.getvalue(), file_name)
+
+
+# Parsed sheets are shared by content hash; pipeline steps never modify them
+@st.cache_resource(max_entries=16, show_spinner="Reading file...")
+def load_sheet(data_hash, file_name, sheet_name, chunked, _uploaded_file):
+    with perf.span("ingest.read_sheet", chunked=chunked) as record:
+        df = ingest.read_sheet(
+            _uploaded_file.getvalue(), file_name, sheet_name, chunked
+        )
+        record["rows"] = len(df)
+    return df
+
+
+# Column stats per sheet, keyed by content hash like the parsed sheets
+@st.cache_data(max_entries=32, show_spinner="Profiling columns...")
+def profile_sheet(data_hash, file_name, sheet_name, chunked, _uploaded_file):
+    df = load_sheet(data_hash, file_name, sheet_name, chunked, _uploaded_file)
+    with perf.span("profiling.profile", rows=len(df)):
+        return profiling.profile(df), len(df), profiling.duplicate_row_share(df)
+
+
+@perf.timed
+def show_profile(data_hash, uploaded_file, selected_sheet, sheet_names, chunked):
+    st.markdown("**Column profile**")
+    all_sheets = len(sheet_names) > 1 and st.toggle("Profile all sheets")
+    for sheet_name in sheet_names if all_sheets else [selected_sheet]:
+        table, rows, duplicates = profile_sheet(
+            data_hash, uploaded_file.name, sheet_name, chunked, uploaded_file
+        )
+        st.caption(f"{sheet_name}: {rows:,} rows, {duplicates:.1%} duplicate rows")
+        st.dataframe(table, hide_index=True)
+    st.caption(
+        f"Distinct counts for columns over {profiling.EXACT_DISTINCT_ROWS:,} rows "
+        "are estimates."
+    )
+
+
+# Intermediate cleaning results, keyed by input and pipeline step prefix
+@st.cache_resource
+def get_pipeline_cache():
+    return pipeline.PrefixCache()
+
+
+# Export bytes are built on request only, and cached by upload and options
+@st.cache_data(max_entries=8, show_spinner="Preparing download...")
+def build_export(export_key, export_format, _sheets, sheet_name):
+    return export.build(export_format, _sheets, sheet_name)
+
+
+def download_clean(cleaned_file, file_name_with_extension, mime):
+    st.download_button(
+        label="Download Cleaned File",
+        data=cleaned_file,
+        key="cleaned_file",
+        file_name=file_name_with_extension,
+        mime=mime,
+    )
+
+
+def build_pipeline(df, clean_options):
+    # Collects the cleaning options as pipeline steps; nothing runs here
+    steps = []
+    columns = list(df.columns)
+    if "Replace" in clean_options:
+        custom_value = st.text_input("Enter a value to replace nulls:", "NULL")
+        steps.append(pipeline.Replace(custom_value))
+    if "Remove Duplicate" in clean_options:
+        subset = st.multiselect(
+            "Columns that identify a duplicate (leave empty to compare whole rows):",
+            columns,
+        )
+        steps.append(pipeline.RemoveDuplicates(tuple(subset) or None))
+    if "Remove Missing Values" in clean_options:
+        steps.append(pipeline.RemoveMissing())
+    if "Convert to Lowercase" in clean_options:
+        selected_columns = st.multiselect(
+            "Select columns to convert to lowercase:", columns
+        )
+        selected_columns = string_columns(df, selected_columns, "convert to lowercase")
+        steps.append(pipeline.Lowercase(tuple(selected_columns)))
+    if "Delete Columns" in clean_options:
+        columns_to_delete = st.multiselect("Select columns to delete:", columns)
+        steps.append(pipeline.DeleteColumns(tuple(columns_to_delete)))
+        columns = [column for column in columns if column not in columns_to_delete]
+    if "Sort Column" in clean_options:
+        columns_to_sort = st.multiselect("Select columns to sort by:", columns)
+        sort_keys = []
+        for column in columns_to_sort:
+            order_column, missing_column = st.columns(2)
+            sort_order = order_column.radio(
+                f"Sorting order for '{column}':",
+                ["Ascending", "Descending"],
+                horizontal=True,
+                key=f"sort_order_{column}",
+            )
+            na_position = missing_column.radio(
+                f"Missing values in '{column}':",
+                ["Last", "First"],
+                horizontal=True,
+                key=f"sort_missing_{column}",
+            )
+            sort_keys.append((column, sort_order == "Ascending", na_position.lower()))
+        steps.append(pipeline.Sort(tuple(sort_keys)))
+    if "Capitalize Columns" in clean_options:
+        selected_columns_to_capitalize = st.multiselect(
+            "Select columns to capitalize:", columns
+        )
+        selected_columns_to_capitalize = string_columns(
+            df, selected_columns_to_capitalize, "capitalize"
+        )
+        steps.append(pipeline.Capitalize(tuple(selected_columns_to_capitalize)))
+    return pipeline.Pipeline(steps)
+
+
+def string_columns(df, selected_columns, action):
+    valid_columns = []
+    for column in selected_columns:
+        if ingest.is_text_column(df[column]):
+            valid_columns.append(column)
+        else:
+            st.error(
+                f"Column '{column}' is not of string data type. Select a string column to {action}."
+            )
+    return valid_columns
+
+
+# Removed rows as CSV, built on request like the cleaned file exports
+@st.cache_data(max_entries=4, show_spinner="Preparing download...")
+def build_duplicates_csv(prefix_key, _dropped):
+    return _dropped.to_csv(index=False).encode("utf-8")
+
+
+@perf.timed
+def show_duplicates(df, recipe, input_key, file_name):
+    found = pipeline.removed_duplicates(
+        df, recipe.plan(), input_key, get_pipeline_cache()
+    )
+    for i, (prefix_key, duplicates) in found.items():
+        if duplicates is None or not duplicates["removed"]:
+            continue
+        with st.expander(f"{duplicates['removed']} duplicate rows removed"):
+            st.dataframe(duplicates["report"], hide_index=True)
+            state_key = f"duplicates_{i}"
+            if st.button("Prepare removed rows", key=f"prepare_duplicates_{i}"):
+                st.session_state[state_key] = (
+                    prefix_key,
+                    build_duplicates_csv(prefix_key, duplicates["dropped"]),
+                )
+            if st.session_state.get(state_key, (None,))[0] == prefix_key:
+                st.download_button(
+                    label="Download Removed Rows (CSV)",
+                    data=st.session_state[state_key][1],
+                    key=f"download_duplicates_{i}",
+                    file_name=f"{file_name.rsplit('.', 1)[0]}_duplicates.csv",
+                )
+
+
+def load_sample_csv():
+
+    csv_file = """
+    Name,Age,Score,Date
+    John Doe,25,85.6,2023-01-05
+    Alice Smith,30,92.3,2023-02-10
+    Bob Johnson,,78.9,2023-03-15
+    Emily Brown,28,,2023-04-20
+    Michael Lee,,79.5,
+    Sarah Wilson,35,,2023-06-25
+    chris davis,40,88.2,2023-07-30
+    Jessica Taylor,,90.1,2023-08-05
+    David rodriguez,45,86.4,
+    Emma Martinez,,84.7,2023-10-10
+    ryan Anderson,50,87.9,2023-11-15
+    Olivia Thomas,,91.2,2023-12-20
+    Olivia Thomas,,91.2,2023-12-20
+    Jessica Taylor,,90.1,2023-08-05
+    """
+    try:
+        df = pd.read_csv(io.StringIO(csv_file))
+        return df
+    except Exception as e:
+        st.error(f"Error: {e}")
+        return None
+
+
+@st.cache_data
+def load_sample_csv_bytes():
+    sample_df = load_sample_csv()
+    if sample_df is None:
+        return None
+    return sample_df.to_csv(index=False).encode("utf-8")
+
+
+def show():
+    st.header("Data Cleaner")
+    sheets_dataframes = {}
+    uploaded_file = st.file_uploader(
+        "Upload an Excel or CSV file", type=["xls", "xlsx", "csv"]
+    )
+    sample_csv = load_sample_csv_bytes()
+    if sample_csv is not None:
+        st.download_button(
+            label="Download Sample CSV",
+            data=sample_csv,
+            file_name="sample.csv",
+            mime="text/csv",
+        )
+
+    if uploaded_file is not None:
+        chunked = st.checkbox("Large file mode (chunked reading, compact column types)")
+        sheet_names = []
+        try:
+            data_hash = upload_hash(uploaded_file)
+            sheet_names = list_sheets(data_hash, uploaded_file.name, uploaded_file)
+        except Exception as e:
+            st.error(f"Error: {e}")
+        st.success("File uploaded successfully!")
+        selected_sheet = st.selectbox("Select a sheet to clean:", sheet_names)
+        # Only the selected sheet is parsed; other sheets load at export time
+        try:
+            sheets_dataframes[selected_sheet] = load_sheet(
+                data_hash,
+                uploaded_file.name,
+                selected_sheet,
+                chunked,
+                uploaded_file,
+            )
+        except Exception as e:
+            st.error(f"Error: {e}")
+            return
+        options_column, profile_column = st.columns([2, 3])
+        with profile_column:
+            show_profile(data_hash, uploaded_file, selected_sheet, sheet_names, chunked)
+        clean_options = options_column.multiselect(
+            "Select cleaning options:",
+            [
+                "Replace",
+                "Remove Duplicate",
+                "Remove Missing Values",
+                "Convert to Lowercase",
+                "Delete Columns",
+                "Sort Column",
+                "Capitalize Columns",
+            ],
+        )
+        input_df = sheets_dataframes[selected_sheet]
+        input_key = (data_hash, selected_sheet, chunked)
+        recipe = build_pipeline(input_df, clean_options)
+        with perf.span("pipeline.run", rows_in=len(input_df)):
+            sheets_dataframes[selected_sheet] = recipe.run(
+                input_df, input_key=input_key, cache=get_pipeline_cache()
+            )
+        for step in recipe.steps:
+            st.write(step.describe())
+        show_duplicates(input_df, recipe, input_key, uploaded_file.name)
+        input_file_name = uploaded_file.name.rsplit(".", 1)[0]
+        export_formats = ["csv", "csv.gz", "parquet"]
+        if ingest.is_excel(uploaded_file.name):
+            export_formats.insert(0, "xlsx")
+        export_format = st.selectbox(
+            "Download format:",
+            export_formats,
+            format_func=lambda export_format: export.FORMATS[export_format][0],
+        )
+        # Same upload, sheet, options and format give the same bytes
+        export_key = (
+            data_hash,
+            chunked,
+            selected_sheet,
+            recipe.to_json(),
+            export_format,
+        )
+        if st.button("Prepare download"):
+            if export_format == "xlsx":
+                # Untouched sheets are only parsed now, for the workbook export
+                sheets_dataframes = {
+                    sheet_name: (
+                        sheets_dataframes[sheet_name]
+                        if sheet_name in sheets_dataframes
+                        else load_sheet(
+                            data_hash,
+                            uploaded_file.name,
+                            sheet_name,
+                            chunked,
+                            uploaded_file,
+                        )
+                    )
+                    for sheet_name in sheet_names
+                }
+            st.session_state["export"] = (
+                export_key,
+                build_export(
+                    export_key, export_format, sheets_dataframes, selected_sheet
+                ),
+            )
+        if st.session_state.get("export", (None,))[0] == export_key:
+            _, extension, mime = export.FORMATS[export_format]
+            download_clean(
+                st.session_state["export"][1],
+                f"{input_file_name}_cleaned.{extension}",
+                mime,
+            )
+
+        st.dataframe(sheets_dataframes[selected_sheet])
+
+        st.download_button(
+            label="Download Cleaning Recipe (JSON)",
+            data=recipe.to_json(),
+            key="cleaning_recipe",
+            file_name=f"{input_file_name}_recipe.json",
+            mime="application/json",
+        )
+
+        st.sidebar.markdown("### Summary of Cleaning Operations")
+        for step in recipe.steps:
+            st.sidebar.write(f"- {step.describe()}")
+
+    st.sidebar.markdown("### Project Description")
+    st.sidebar.markdown(
+        """
+    This project provides a user-friendly interface for cleaning and processing tabular data files (CSV, XLS, XLSX). 
+    You can perform the following operations on your data:
+
+    - **Replace Null Values:** Replace missing (null) values with a custom value.
+    - **Remove Duplicate Rows:** Eliminate duplicate rows, comparing whole rows or only chosen key columns. Removed rows can be reviewed per key and downloaded.
+    - **Remove Missing Values:** Remove rows containing missing values.
+    - **Convert to Lowercase:** Convert text columns to lowercase.
+    - **Delete Columns:** Select and delete specific columns from the dataset.
+    - **Sort Column:** Sort by one or more columns, each ascending or descending with missing values first or last. Columns sort by their type, so numbers sort numerically.
+    - **Capitalize Columns:** Capitalize the first letter of elements in selected columns.
+
+    You can download the cleaned data in the same format as your input file, or as CSV, gzip-compressed CSV or Parquet.
+    """
+    )
@@ -0,0 +1,555 @@
+import os
+import queue
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+
+import pandas as pd
+from dotenv import load_dotenv
+
+import perf
+
+# Load environment variables from .env file
+load_dotenv()
+
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql").lower()
+DB_HOST = os.getenv("DB_HOST")
+DB_USER = os.getenv("DB_USER")
+DB_PASSWORD = os.getenv("DB_PASSWORD")
+DB_DATABASE = os.getenv("DB_DATABASE")
+DB_SQLITE_PATH = os.getenv("DB_SQLITE_PATH", "timestamps.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+
+TABLES = ("clean_data", "raw_data")
+
+# Per-table event counts for each local (IST) day, with one column per hour,
+# kept in step with every insert and delete
+ROLLUP_TABLE = "daily_rollup"
+HOUR_COLUMNS = tuple(f"H{hour:02d}" for hour in range(24))
+
+# Timestamps are stored as naive UTC DATETIME values and shown in IST
+LOCAL_TIMEZONE = "Asia/Kolkata"
+LEGACY_DATE_FORMAT = "%d %B %Y"
+LEGACY_TIME_FORMAT = "%I:%M %p"
+
+# AUTOINCREMENT keeps SQLite from reusing the ID of a deleted latest entry,
+# matching MySQL's AUTO_INCREMENT
+SCHEMA = {
+    "sqlite": [
+        "CREATE TABLE {table} "
+        "(ID INTEGER PRIMARY KEY AUTOINCREMENT, Timestamp DATETIME NOT NULL)",
+        "CREATE INDEX idx_{table}_timestamp ON {table} (Timestamp)",
+    ],
+    "mysql": [
+        "CREATE TABLE {table} (ID INT NOT NULL AUTO_INCREMENT PRIMARY KEY, "
+        "Timestamp DATETIME NOT NULL, INDEX idx_{table}_timestamp (Timestamp))",
+    ],
+}
+
+ROLLUP_SCHEMA = (
+    f"CREATE TABLE {ROLLUP_TABLE} (TableName VARCHAR(32) NOT NULL, "
+    "Day DATE NOT NULL, Count INT NOT NULL DEFAULT 0, "
+    + "".join(f"{column} INT NOT NULL DEFAULT 0, " for column in HOUR_COLUMNS)
+    + "PRIMARY KEY (TableName, Day))"
+)
+
+ROLLUP_ADD = {
+    "sqlite": "ON CONFLICT (TableName, Day) DO UPDATE SET "
+    "Count = Count + 1, {hour} = {hour} + 1",
+    "mysql": "ON DUPLICATE KEY UPDATE Count = Count + 1, {hour} = {hour} + 1",
+}
+
+# Adds a batch's counts to the rollup rows: {column} = {column} + <new value>
+ROLLUP_MERGE = {
+    "sqlite": ("ON CONFLICT (TableName, Day) DO UPDATE SET ", "excluded.{column}"),
+    "mysql": ("ON DUPLICATE KEY UPDATE ", "VALUES({column})"),
+}
+
+# Client event IDs of the saves written from the write-behind queue, so a
+# retried batch, or the same events flushed by a second writer, is never
+# inserted twice. IDs are kept for EVENTS_RETENTION_DAYS after they are
+# applied, far longer than any committed event stays queued.
+EVENTS_TABLE = "applied_events"
+EVENTS_SCHEMA = (
+    f"CREATE TABLE {EVENTS_TABLE} "
+    "(EventID CHAR(32) NOT NULL PRIMARY KEY, AppliedAt DATETIME NOT NULL)"
+)
+EVENTS_RETENTION_DAYS = int(os.getenv("EVENTS_RETENTION_DAYS", "7"))
+
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_converter(
+    "DATETIME", lambda value: datetime.fromisoformat(value.decode())
+)
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_converter("DATE", lambda value: date.fromisoformat(value.decode()))
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+def __getattr__(name):
+    # db.Error: errors raised by either backend, for callers that report
+    # database failures. mysql.connector is only imported when the MySQL
+    # backend connects, and none of its errors can be raised before that.
+    if name == "Error":
+        return _errors()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _errors():
+    mysql = sys.modules.get("mysql.connector")
+    return (sqlite3.Error,) + ((mysql.Error,) if mysql is not None else ())
+
+
+class Cursor:
+    # Thin wrapper so callers can write "%s" placeholders for every backend.
+    # Statements and commits sent to the server are counted in round_trips
+    # and timed as perf spans.
+
+    def __init__(self, raw, conn, backend="mysql"):
+        self._raw = raw
+        self._conn = conn
+        self.backend = backend
+        self.round_trips = 0
+
+    def _query(self, query):
+        return query.replace("%s", "?") if self.backend == "sqlite" else query
+
+    def execute(self, query, params=()):
+        self.round_trips += 1
+        with perf.span("db.execute", statement=query.split(None, 1)[0].upper()):
+            self._raw.execute(self._query(query), params)
+
+    def executemany(self, query, seq_of_params):
+        self.round_trips += 1
+        with perf.span("db.executemany") as record:
+            seq_of_params = list(seq_of_params)
+            record["rows"] = len(seq_of_params)
+            self._raw.executemany(self._query(query), seq_of_params)
+
+    def commit(self):
+        self.round_trips += 1
+        with perf.span("db.commit"):
+            self._conn.commit()
+
+    def fetchone(self):
+        return self._raw.fetchone()
+
+    def fetchall(self):
+        with perf.span("db.fetchall") as record:
+            rows = self._raw.fetchall()
+            record["rows"] = len(rows)
+        return rows
+
+    def fetchmany(self, size):
+        with perf.span("db.fetchmany") as record:
+            rows = self._raw.fetchmany(size)
+            record["rows"] = len(rows)
+        return rows
+
+    @property
+    def description(self):
+        return self._raw.description
+
+    @property
+    def lastrowid(self):
+        return self._raw.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._raw.rowcount
+
+    def close(self):
+        self._raw.close()
+
+
+class ConnectionPool:
+    def __init__(self, connect, ping, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT):
+        self.backend = None
+        self._connect = connect
+        self._ping = ping
+        self._timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._slots = threading.BoundedSemaphore(size)
+
+    def acquire(self):
+        with perf.span("db.acquire"):
+            return self._acquire()
+
+    def _acquire(self):
+        if not self._slots.acquire(timeout=self._timeout):
+            raise PoolTimeout("Timed out waiting for a free database connection.")
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = None
+            # Stale connections (server restart, wait_timeout) are replaced
+            if conn is not None and not self._ping(conn):
+                _close_quietly(conn)
+                conn = None
+            if conn is None:
+                with perf.span("db.connect"):
+                    conn = self._connect()
+            return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn, discard=False):
+        try:
+            if discard:
+                _close_quietly(conn)
+            else:
+                self._idle.put_nowait(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        # Writers commit their own work. Whatever is left open is rolled back
+        # before the connection goes idle, including a read-only transaction:
+        # under REPEATABLE READ its snapshot would otherwise keep serving the
+        # data as of the connection's first query.
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            discard = False
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+            self.release(conn, discard=discard)
+
+    def close(self):
+        while True:
+            try:
+                _close_quietly(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+@contextmanager
+def cursor(conn):
+    backend = "sqlite" if isinstance(conn, sqlite3.Connection) else "mysql"
+    cur = Cursor(conn.cursor(), conn, backend)
+    try:
+        yield cur
+    finally:
+        cur.close()
+
+
+def table_columns(db_cursor, table_name):
+    try:
+        db_cursor.execute(f"SELECT * FROM {table_name} LIMIT 0")
+    except _errors():
+        return None
+    db_cursor.fetchall()
+    return [desc[0] for desc in db_cursor.description]
+
+
+def ensure_schema(conn, backend):
+    with cursor(conn) as db_cursor:
+        for table_name in TABLES:
+            if table_columns(db_cursor, table_name) is None:
+                for statement in SCHEMA[backend]:
+                    db_cursor.execute(statement.format(table=table_name))
+        db_cursor.commit()
+        if table_columns(db_cursor, ROLLUP_TABLE) is None:
+            db_cursor.execute(ROLLUP_SCHEMA)
+            # Tables still on the legacy Date/Time columns are rolled up by
+            # "migrate.py datetime" once converted
+            for table_name in TABLES:
+                if "Timestamp" in table_columns(db_cursor, table_name):
+                    rebuild_rollup(db_cursor, table_name)
+            db_cursor.commit()
+        events_columns = table_columns(db_cursor, EVENTS_TABLE)
+        if events_columns is None:
+            db_cursor.execute(EVENTS_SCHEMA)
+            db_cursor.commit()
+        elif "AppliedAt" not in events_columns:
+            # Tables created before retention: existing IDs start their
+            # retention now
+            db_cursor.execute(
+                f"ALTER TABLE {EVENTS_TABLE} ADD COLUMN AppliedAt DATETIME"
+            )
+            db_cursor.execute(
+                f"UPDATE {EVENTS_TABLE} SET AppliedAt = %s",
+                (to_storage(datetime.now(timezone.utc)),),
+            )
+            db_cursor.commit()
+
+
+def to_storage(moment):
+    return moment.astimezone(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+def to_local(timestamps):
+    with perf.span("db.to_local", rows=len(timestamps)):
+        return (
+            pd.to_datetime(timestamps)
+            .dt.tz_localize("UTC")
+            .dt.tz_convert(LOCAL_TIMEZONE)
+        )
+
+
+def parse_legacy(dates, times):
+    local = pd.to_datetime(
+        dates + " " + times.str.upper(),
+        format=f"{LEGACY_DATE_FORMAT} {LEGACY_TIME_FORMAT}",
+        errors="coerce",
+    )
+    return local.dt.tz_localize(LOCAL_TIMEZONE).dt.tz_convert("UTC")
+
+
+def legacy_frame(df):
+    # ID/Date/Time strings in the format the app wrote before the migration
+    return pd.DataFrame(
+        {
+            "ID": df["ID"],
+            "Date": df["Timestamp"].dt.strftime(LEGACY_DATE_FORMAT),
+            "Time": df["Timestamp"].dt.strftime(LEGACY_TIME_FORMAT).str.lower(),
+        }
+    )
+
+
+def insert_entry(db_cursor, timestamp):
+    # IDs come from AUTO_INCREMENT; both rows and their rollup counts commit
+    # together
+    values = (to_storage(timestamp),)
+    db_cursor.execute("INSERT INTO clean_data (Timestamp) VALUES (%s)", values)
+    db_cursor.execute("INSERT INTO raw_data (Timestamp) VALUES (%s)", values)
+    local = local_moment(values[0])
+    hour = HOUR_COLUMNS[local.hour]
+    placeholders = ", ".join(["(%s, %s, 1, 1)"] * len(TABLES))
+    db_cursor.execute(
+        f"INSERT INTO {ROLLUP_TABLE} (TableName, Day, Count, {hour}) "
+        f"VALUES {placeholders} " + ROLLUP_ADD[db_cursor.backend].format(hour=hour),
+        tuple(value for table_name in TABLES for value in (table_name, local.date())),
+    )
+    db_cursor.commit()
+
+
+def insert_events(db_cursor, events):
+    # events: [(event_id, stored timestamp)] in save order. Both tables get
+    # one multi-row insert and the rollup one upsert, committed together with
+    # the event IDs. IDs already applied are skipped; a concurrent flush of
+    # the same events fails on the primary key and rolls back. Returns the
+    # number of events written.
+    placeholders = ", ".join(["%s"] * len(events))
+    db_cursor.execute(
+        f"SELECT EventID FROM {EVENTS_TABLE} WHERE EventID IN ({placeholders})",
+        tuple(event_id for event_id, _ in events),
+    )
+    applied = {row[0] for row in db_cursor.fetchall()}
+    events = [event for event in events if event[0] not in applied]
+    if not events:
+        return 0
+    applied_at = to_storage(datetime.now(timezone.utc))
+    db_cursor.execute(
+        f"INSERT INTO {EVENTS_TABLE} (EventID, AppliedAt) "
+        f"VALUES {', '.join(['(%s, %s)'] * len(events))}",
+        tuple(value for event_id, _ in events for value in (event_id, applied_at)),
+    )
+    rows = ", ".join(["(%s)"] * len(events))
+    stored = tuple(timestamp for _, timestamp in events)
+    for table_name in TABLES:
+        db_cursor.execute(f"INSERT INTO {table_name} (Timestamp) VALUES {rows}", stored)
+    local = to_local(pd.Series(stored)).dt.tz_localize(None)
+    counts = (
+        local.groupby([local.dt.normalize(), local.dt.hour])
+        .size()
+        .unstack(fill_value=0)
+        .reindex(columns=range(24), fill_value=0)
+    )
+    columns = ("Count",) + HOUR_COLUMNS
+    prefix, merged = ROLLUP_MERGE[db_cursor.backend]
+    placeholders = "(" + ", ".join(["%s"] * (len(columns) + 2)) + ")"
+    db_cursor.execute(
+        f"INSERT INTO {ROLLUP_TABLE} (TableName, Day, {', '.join(columns)}) "
+        f"VALUES {', '.join([placeholders] * len(TABLES) * len(counts))} "
+        + prefix
+        + ", ".join(
+            f"{column} = {column} + {merged.format(column=column)}"
+            for column in columns
+        ),
+        tuple(
+            value
+            for table_name in TABLES
+            for day, hours in zip(counts.index, counts.to_numpy())
+            for value in (table_name, day.date(), int(hours.sum()), *map(int, hours))
+        ),
+    )
+    db_cursor.commit()
+    return len(events)
+
+
+def prune_events(db_cursor, retention_days=EVENTS_RETENTION_DAYS):
+    # Drops event IDs applied more than retention_days ago
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    db_cursor.execute(
+        f"DELETE FROM {EVENTS_TABLE} WHERE AppliedAt < %s", (to_storage(cutoff),)
+    )
+    db_cursor.commit()
+    return db_cursor.rowcount
+
+
+def delete_latest(db_cursor):
+    # Removes the newest row of each table and its rollup count in one
+    # transaction; False when a table is empty
+    latest = {}
+    for table_name in TABLES:
+        db_cursor.execute(
+            f"SELECT ID, Timestamp FROM {table_name} ORDER BY ID DESC LIMIT 1"
+        )
+        latest[table_name] = db_cursor.fetchone()
+    if None in latest.values():
+        return False
+    for table_name, (row_id, stored) in latest.items():
+        db_cursor.execute(f"DELETE FROM {table_name} WHERE ID = %s", (row_id,))
+        local = local_moment(stored)
+        hour = HOUR_COLUMNS[local.hour]
+        db_cursor.execute(
+            f"UPDATE {ROLLUP_TABLE} SET Count = Count - 1, {hour} = {hour} - 1 "
+            "WHERE TableName = %s AND Day = %s",
+            (table_name, local.date()),
+        )
+    db_cursor.commit()
+    return True
+
+
+def local_moment(stored):
+    return pd.Timestamp(stored).tz_localize("UTC").tz_convert(LOCAL_TIMEZONE)
+
+
+def rebuild_rollup(db_cursor, table_name, chunk_size=100_000):
+    # Recounts a table's rollup rows from its events; the caller commits
+    db_cursor.execute(f"SELECT Timestamp FROM {table_name}")
+    totals = pd.DataFrame(columns=range(24), dtype="int64")
+    while True:
+        rows = db_cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        local = to_local(pd.Series([row[0] for row in rows])).dt.tz_localize(None)
+        counts = local.groupby([local.dt.normalize(), local.dt.hour]).size()
+        totals = totals.add(counts.unstack(fill_value=0), fill_value=0)
+    totals = totals.reindex(columns=range(24), fill_value=0).fillna(0).astype("int64")
+    db_cursor.execute(f"DELETE FROM {ROLLUP_TABLE} WHERE TableName = %s", (table_name,))
+    columns = ", ".join(HOUR_COLUMNS)
+    placeholders = ", ".join(["%s"] * (len(HOUR_COLUMNS) + 3))
+    db_cursor.executemany(
+        f"INSERT INTO {ROLLUP_TABLE} (TableName, Day, Count, {columns}) "
+        f"VALUES ({placeholders})",
+        [
+            (table_name, day.date(), int(hours.sum()), *map(int, hours))
+            for day, hours in zip(totals.index, totals.to_numpy())
+        ],
+    )
+    return len(totals)
+
+
+def fetch_page(db_cursor, table_name, before_id=None, limit=50):
+    # Keyset pagination, newest first: the page ends where the next one starts
+    if before_id is None:
+        db_cursor.execute(
+            f"SELECT ID, Timestamp FROM {table_name} ORDER BY ID DESC LIMIT %s",
+            (limit,),
+        )
+    else:
+        db_cursor.execute(
+            f"SELECT ID, Timestamp FROM {table_name} WHERE ID < %s "
+            "ORDER BY ID DESC LIMIT %s",
+            (before_id, limit),
+        )
+    df = pd.DataFrame(db_cursor.fetchall(), columns=["ID", "Timestamp"])
+    df["Timestamp"] = to_local(df["Timestamp"])
+    return df
+
+
+def page_start_for_date(db_cursor, table_name, day):
+    # before_id for a page whose first row is the last entry on or before day
+    next_day = pd.Timestamp(day).tz_localize(LOCAL_TIMEZONE) + pd.Timedelta(days=1)
+    db_cursor.execute(
+        f"SELECT MAX(ID) FROM {table_name} WHERE Timestamp < %s",
+        (to_storage(next_day.to_pydatetime()),),
+    )
+    return (db_cursor.fetchone()[0] or 0) + 1
+
+
+def stream_csv(db_cursor, table_name, out, chunk_size=10000):
+    # Writes the legacy ID/Date/Time CSV, newest first, chunk by chunk
+    db_cursor.execute(f"SELECT ID, Timestamp FROM {table_name} ORDER BY ID DESC")
+    header = True
+    while True:
+        rows = db_cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        chunk = pd.DataFrame(rows, columns=["ID", "Timestamp"])
+        chunk["Timestamp"] = to_local(chunk["Timestamp"])
+        legacy_frame(chunk).to_csv(out, index=False, header=header)
+        header = False
+    if header:
+        out.write(b"ID,Date,Time\n")
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+def _connect_mysql():
+    import mysql.connector
+
+    return mysql.connector.connect(
+        host=DB_HOST, user=DB_USER, password=DB_PASSWORD, database=DB_DATABASE
+    )
+
+
+def _ping_mysql(conn):
+    import mysql.connector
+
+    try:
+        conn.ping(reconnect=False)
+        return True
+    except mysql.connector.Error:
+        return False
+
+
+def _connect_sqlite(path):
+    conn = sqlite3.connect(
+        path,
+        timeout=DB_POOL_TIMEOUT,
+        check_same_thread=False,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def _ping_sqlite(conn):
+    try:
+        conn.execute("SELECT 1")
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def create_pool(backend=DB_BACKEND, sqlite_path=DB_SQLITE_PATH, size=DB_POOL_SIZE):
+    if backend == "sqlite":
+        pool = ConnectionPool(lambda: _connect_sqlite(sqlite_path), _ping_sqlite, size)
+        with pool.connection() as conn:
+            ensure_schema(conn, backend)
+    elif backend == "mysql":
+        pool = ConnectionPool(_connect_mysql, _ping_mysql, size)
+    else:
+        raise ValueError(f"Unknown DB_BACKEND: {backend}")
+    pool.backend = backend
+    return pool
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+# Integers beyond this lose precision as float64, so they are hashed as is
+EXACT_FLOAT_LIMIT = 2**53
+
+
+def fingerprints(df, subset=None):
+    # One 64-bit hash per row over `subset` (all columns if empty). Integer
+    # columns are hashed as floats so a column read as int in one chunk and
+    # as float (because of a blank) in another still matches.
+    keys = df[list(subset)] if subset else df
+    normalized = {}
+    for position, column in enumerate(keys.columns):
+        values = keys.iloc[:, position]
+        if pd.api.types.is_integer_dtype(values.dtype) and not (
+            len(values) and values.abs().max() >= EXACT_FLOAT_LIMIT
+        ):
+            values = values.astype("float64")
+        normalized[position] = values
+    return pd.util.hash_pandas_object(
+        pd.DataFrame(normalized, index=keys.index), index=False
+    ).to_numpy()
+
+
+class Deduplicator:
+    # Streaming drop_duplicates(keep="first"): remembers a sorted array of
+    # fingerprints instead of rows, so memory grows with the number of
+    # unique keys and not with the data. Feed chunks (or sheets) in order.
+    # Distinct keys sharing a 64-bit hash would be treated as duplicates;
+    # at a billion keys the chance of any collision is about 3%.
+
+    def __init__(self, subset=None, on_dropped=None):
+        self.subset = list(subset) if subset else None
+        self.on_dropped = on_dropped
+        self.removed = 0
+        self._seen = np.empty(0, dtype="uint64")
+        self._dropped = []
+
+    def filter(self, df):
+        if self.subset and not set(self.subset) <= set(df.columns):
+            return df
+        hashes = fingerprints(df, self.subset)
+        first = ~pd.Series(hashes).duplicated().to_numpy()
+        if len(self._seen):
+            positions = np.searchsorted(self._seen, hashes)
+            positions[positions == len(self._seen)] = 0
+            first &= self._seen[positions] != hashes
+        if first.all():
+            self._remember(hashes)
+            return df
+        self._remember(hashes[first])
+        dropped = ~first
+        self.removed += int(dropped.sum())
+        self._record(df[dropped], hashes[dropped])
+        return df[first]
+
+    def _remember(self, hashes):
+        self._seen = np.sort(np.concatenate([self._seen, hashes]))
+
+    def _record(self, dropped, hashes):
+        unique, index, counts = np.unique(hashes, return_index=True, return_counts=True)
+        keys = dropped[self.subset] if self.subset else dropped
+        self._dropped.append((unique, counts, keys.iloc[index]))
+        if self.on_dropped is not None:
+            self.on_dropped(dropped)
+
+    def report(self):
+        # Duplicates removed per key, most repeated first
+        if not self._dropped:
+            return pd.DataFrame(columns=(self.subset or []) + ["Duplicates Removed"])
+        keys = pd.concat([keys for _, _, keys in self._dropped], ignore_index=True)
+        hashes = np.concatenate([unique for unique, _, _ in self._dropped])
+        counts = np.concatenate([counts for _, counts, _ in self._dropped])
+        totals = pd.Series(counts).groupby(hashes, sort=False).sum()
+        first = ~pd.Series(hashes).duplicated().to_numpy()
+        report = keys[first].reset_index(drop=True)
+        report["Duplicates Removed"] = totals.loc[hashes[first]].to_numpy()
+        return report.sort_values(
+            "Duplicates Removed", ascending=False, kind="stable"
+        ).reset_index(drop=True)
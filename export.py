@@ -0,0 +1,72 @@
+import importlib.util
+import io
+
+import pandas as pd
+
+import perf
+
+# xlsxwriter writes large workbooks several times faster than openpyxl
+EXCEL_ENGINE = "xlsxwriter" if importlib.util.find_spec("xlsxwriter") else "openpyxl"
+
+# format: (label, file extension, MIME type)
+FORMATS = {
+    "xlsx": (
+        "Excel workbook (.xlsx)",
+        "xlsx",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ),
+    "csv": ("CSV", "csv", "text/csv"),
+    "csv.gz": ("CSV, gzip compressed", "csv.gz", "application/gzip"),
+    "parquet": ("Parquet", "parquet", "application/vnd.apache.parquet"),
+}
+
+
+def build(export_format, sheets, sheet_name):
+    with perf.span(f"export.{export_format}") as record:
+        data = _build(export_format, sheets, sheet_name)
+        record["bytes"] = len(data)
+    return data
+
+
+def _build(export_format, sheets, sheet_name):
+    # Workbooks get every sheet; the other formats hold the cleaned sheet only
+    if export_format == "xlsx":
+        return to_excel(sheets)
+    if export_format == "parquet":
+        return to_parquet(sheets[sheet_name])
+    compression = None
+    if export_format == "csv.gz":
+        # mtime=0 so the same data always gives the same bytes
+        compression = {"method": "gzip", "mtime": 0}
+    return to_csv(sheets[sheet_name], compression)
+
+
+def to_excel(sheets):
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine=EXCEL_ENGINE) as writer:
+        for sheet_name, sheet_df in sheets.items():
+            sheet_df.to_excel(writer, sheet_name=sheet_name, index=False)
+    return buffer.getvalue()
+
+
+def to_csv(df, compression=None):
+    buffer = io.BytesIO()
+    df.to_csv(buffer, index=False, compression=compression)
+    return buffer.getvalue()
+
+
+def to_parquet(df):
+    buffer = io.BytesIO()
+    arrow_safe(df).to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+def arrow_safe(df):
+    # Parquet needs one type per column, so object columns mixing types
+    # (numbers and the "NULL" placeholder after Replace, say) become strings
+    df = df.copy(deep=False)
+    for column in df.select_dtypes(include="object").columns:
+        if pd.api.types.infer_dtype(df[column], skipna=True).startswith("mixed"):
+            values = df[column]
+            df[column] = values.where(values.isna(), values.astype(str))
+    return df
@@ -0,0 +1,95 @@
+import hashlib
+import io
+
+import pandas as pd
+
+CSV_SHEET_NAME = "Sheet 1"
+CHUNK_SIZE = 100_000
+SAMPLE_ROWS = 10_000
+# String columns with at most this share of distinct values become categoricals
+CATEGORY_RATIO = 0.5
+# Other string columns are stored in Arrow buffers instead of Python objects
+STRING_DTYPE = "string[pyarrow]"
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def is_excel(file_name):
+    return file_name.endswith(("xls", "xlsx"))
+
+
+def sheet_names(data, file_name):
+    if is_excel(file_name):
+        return pd.ExcelFile(io.BytesIO(data)).sheet_names
+    return [CSV_SHEET_NAME]
+
+
+def read_sheet(data, file_name, sheet_name, chunked=False):
+    if is_excel(file_name):
+        df = pd.read_excel(io.BytesIO(data), sheet_name=sheet_name)
+        return compact(df) if chunked else df
+    if chunked:
+        return read_csv_chunked(io.BytesIO(data))
+    return pd.read_csv(io.BytesIO(data))
+
+
+def category_columns(sample, ratio=CATEGORY_RATIO):
+    columns = []
+    for column in sample.select_dtypes(include="object").columns:
+        values = sample[column].dropna()
+        if len(values) and values.nunique() <= ratio * len(values):
+            columns.append(column)
+    return columns
+
+
+def downcast(df):
+    for column in df.select_dtypes(include="integer").columns:
+        df[column] = pd.to_numeric(df[column], downcast="integer")
+    return df
+
+
+def compact(df, ratio=CATEGORY_RATIO):
+    df = downcast(df.copy())
+    categories = category_columns(df, ratio)
+    for column in df.select_dtypes(include="object").columns:
+        if column in categories:
+            df[column] = df[column].astype("category")
+        elif pd.api.types.infer_dtype(df[column], skipna=True) == "string":
+            df[column] = df[column].astype(STRING_DTYPE)
+    return df
+
+
+def read_csv_chunked(source, chunk_size=CHUNK_SIZE, sample_rows=SAMPLE_ROWS):
+    # Infer categorical columns from a leading sample, then parse the file in
+    # chunks so only one chunk of raw objects is alive at a time.
+    sample = pd.read_csv(source, nrows=sample_rows)
+    source.seek(0)
+    categories = category_columns(sample)
+    dtype = {
+        column: "category" if column in categories else STRING_DTYPE
+        for column in sample.select_dtypes(include="object").columns
+    }
+    chunks = [
+        downcast(chunk)
+        for chunk in pd.read_csv(source, chunksize=chunk_size, dtype=dtype)
+    ]
+    if not chunks:
+        return sample
+    for column in categories:
+        # Give every chunk the same categories so concat keeps the dtype
+        union = pd.Index(
+            pd.concat(
+                [chunk[column].cat.categories.to_series() for chunk in chunks]
+            ).unique()
+        )
+        for chunk in chunks:
+            chunk[column] = chunk[column].cat.set_categories(union)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def is_text_column(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.categories.dtype == "object"
+    return series.dtype == "object" or pd.api.types.is_string_dtype(series.dtype)
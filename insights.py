@@ -0,0 +1,451 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+
+import db
+
+INSIGHTS = ("monthly", "daily", "weekday", "minutes")
+
+MINUTES_PER_DAY = 24 * 60
+BUCKET_WIDTHS = (15, 30, 60)
+
+MONTH_ORDER = [
+    "January",
+    "February",
+    "March",
+    "April",
+    "May",
+    "June",
+    "July",
+    "August",
+    "September",
+    "October",
+    "November",
+    "December",
+]
+
+DAY_ORDER = [
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+    "Sunday",
+]
+
+# Bucket expressions per backend. {ts} is the local (IST) timestamp; buckets
+# come back as yyyymm ints, dates, Monday=0 weekdays and minutes of the day.
+DIALECTS = {
+    "mysql": {
+        "local": "DATE_ADD(Timestamp, INTERVAL {offset} MINUTE)",
+        "monthly": "YEAR({ts}) * 100 + MONTH({ts})",
+        "daily": "DATE({ts})",
+        "weekday": "WEEKDAY({ts})",
+        "minutes": "HOUR({ts}) * 60 + MINUTE({ts})",
+        "hour": "HOUR({ts})",
+    },
+    "sqlite": {
+        "local": "datetime(Timestamp, '{offset:+d} minutes')",
+        "monthly": "CAST(strftime('%Y%m', {ts}) AS INTEGER)",
+        "daily": "date({ts})",
+        "weekday": "(CAST(strftime('%w', {ts}) AS INTEGER) + 6) % 7",
+        "minutes": "CAST(strftime('%H', {ts}) AS INTEGER) * 60 "
+        "+ CAST(strftime('%M', {ts}) AS INTEGER)",
+        "hour": "CAST(strftime('%H', {ts}) AS INTEGER)",
+    },
+}
+
+
+@dataclass(frozen=True)
+class Filters:
+    # Analysis window: local (IST) dates, both ends inclusive, Monday=0
+    # weekdays and local hours 0-23. Unset fields do not restrict.
+    start: date = None
+    end: date = None
+    weekdays: tuple = ()
+    hours: tuple = ()
+
+    def active(self):
+        return self != Filters()
+
+
+def local_offset_minutes():
+    # IST has had a fixed +05:30 offset since 1945, so one offset covers all rows
+    offset = pd.Timestamp.now(tz=db.LOCAL_TIMEZONE).utcoffset()
+    return int(offset.total_seconds() // 60)
+
+
+def high_water_mark(db_cursor, table_name):
+    db_cursor.execute(f"SELECT MAX(ID) FROM {table_name}")
+    return db_cursor.fetchone()[0] or 0
+
+
+def where_clause(backend, after_id=0, upto_id=None, filters=None):
+    # The date range is compared against the stored UTC Timestamp itself so
+    # the Timestamp index narrows the scan; weekday and hour are then checked
+    # on the local time of the remaining rows only.
+    filters = filters or Filters()
+    clauses, params = [], []
+    id_column = "ID"
+    if after_id:
+        # Incremental loads read only rows past the cached high-water mark
+        clauses.append("ID > %s")
+        params.append(after_id)
+    elif filters.start is not None or filters.end is not None:
+        # The Timestamp index should drive the scan; written as an expression
+        # the ID bound cannot pull the planner onto the primary key instead
+        id_column = "ID + 0"
+    if upto_id is not None:
+        clauses.append(f"{id_column} <= %s")
+        params.append(upto_id)
+    offset = local_offset_minutes()
+    if filters.start is not None:
+        clauses.append("Timestamp >= %s")
+        params.append(utc_midnight(filters.start, offset))
+    if filters.end is not None:
+        clauses.append("Timestamp < %s")
+        params.append(utc_midnight(filters.end + timedelta(days=1), offset))
+    dialect = DIALECTS[backend]
+    local = dialect["local"].format(offset=offset)
+    for field, values in (("weekday", filters.weekdays), ("hour", filters.hours)):
+        if values:
+            placeholders = ", ".join(["%s"] * len(values))
+            clauses.append(f"{dialect[field].format(ts=local)} IN ({placeholders})")
+            params.extend(int(value) for value in values)
+    if not clauses:
+        return "", ()
+    return "WHERE " + " AND ".join(clauses), tuple(params)
+
+
+def utc_midnight(day, offset):
+    # Start of a local day as a naive UTC datetime, the way Timestamp is stored
+    return datetime.combine(day, time()) - timedelta(minutes=offset)
+
+
+def fetch_events(
+    db_cursor, table_name, after_id=0, upto_id=None, filters=None, backend=None
+):
+    where, params = where_clause(backend or db.DB_BACKEND, after_id, upto_id, filters)
+    db_cursor.execute(f"SELECT ID, Timestamp FROM {table_name} {where}", params)
+    df = pd.DataFrame(db_cursor.fetchall(), columns=["ID", "Timestamp"])
+    df["Timestamp"] = db.to_local(df["Timestamp"])
+    return df
+
+
+def query_counts(
+    db_cursor, table_name, backend, after_id=0, upto_id=None, filters=None
+):
+    dialect = DIALECTS[backend]
+    local = dialect["local"].format(offset=local_offset_minutes())
+    where, params = where_clause(backend, after_id, upto_id, filters)
+    counts = {}
+    for insight in INSIGHTS:
+        bucket = dialect[insight].format(ts=local)
+        db_cursor.execute(
+            f"SELECT {bucket} AS bucket, COUNT(*) FROM {table_name} {where} "
+            "GROUP BY bucket ORDER BY bucket",
+            params,
+        )
+        rows = db_cursor.fetchall()
+        counts[insight] = finish(
+            insight, [row[0] for row in rows], [row[1] for row in rows]
+        )
+    return counts
+
+
+def query_rollup(db_cursor, table_name, filters=None):
+    # Rollup engine: one row per day instead of one per event. Hours are the
+    # finest buckets it holds, so "minutes" only has counts on the hour.
+    filters = filters or Filters()
+    where, params = "WHERE TableName = %s AND Count > 0", (table_name,)
+    if filters.start is not None:
+        where += " AND Day >= %s"
+        params += (filters.start,)
+    if filters.end is not None:
+        where += " AND Day <= %s"
+        params += (filters.end,)
+    db_cursor.execute(
+        f"SELECT Day, {', '.join(db.HOUR_COLUMNS)} FROM {db.ROLLUP_TABLE} "
+        f"{where} ORDER BY Day",
+        params,
+    )
+    rows = db_cursor.fetchall()
+    days = pd.DatetimeIndex(pd.to_datetime([row[0] for row in rows]))
+    hours = np.array([row[1:] for row in rows], dtype="int64").reshape(-1, 24)
+    if filters.weekdays:
+        keep = np.isin(days.weekday, filters.weekdays)
+        days, hours = days[keep], hours[keep]
+    if filters.hours:
+        hours[:, ~np.isin(np.arange(24), filters.hours)] = 0
+    daily = hours.sum(axis=1)
+    days, hours, daily = days[daily > 0], hours[daily > 0], daily[daily > 0]
+    monthly = pd.Series(daily).groupby(days.year * 100 + days.month).sum()
+    minutes = np.zeros(MINUTES_PER_DAY, dtype="int64")
+    minutes[::60] = hours.sum(axis=0)
+    return {
+        "monthly": finish("monthly", monthly.index, monthly.values),
+        "daily": finish("daily", days, daily),
+        "weekday": finish(
+            "weekday", range(7), np.bincount(days.weekday, daily, minlength=7)
+        ),
+        "minutes": finish("minutes", range(MINUTES_PER_DAY), minutes),
+    }
+
+
+def build_features(df):
+    # Parse-once frame every pandas-engine insight reads from: one row per
+    # event, compactly typed. Treated as read-only once built.
+    local = df["Timestamp"].dt.tz_localize(None).reset_index(drop=True)
+    features = pd.DataFrame(
+        {
+            "Date": local.dt.normalize(),
+            "Month": pd.Categorical(local.dt.year * 100 + local.dt.month),
+            "Weekday": pd.Categorical.from_codes(
+                local.dt.weekday, categories=DAY_ORDER
+            ),
+            "Hour": local.dt.hour.astype("int8"),
+            "Minute": local.dt.minute.astype("int8"),
+        }
+    )
+    if "ID" in df:
+        features.index = pd.Index(df["ID"].to_numpy(), name="ID")
+    return features
+
+
+def compute_counts(features):
+    # Pandas engine: same buckets as query_counts, computed from build_features
+    monthly = features["Month"].value_counts(sort=False)
+    monthly = monthly[monthly > 0].sort_index()
+    daily = features["Date"].value_counts().sort_index()
+    weekday = np.bincount(features["Weekday"].cat.codes, minlength=7)
+    histogram = minute_histogram(features["Hour"], features["Minute"])
+    return {
+        "monthly": finish("monthly", monthly.index, monthly.values),
+        "daily": finish("daily", daily.index, daily.values),
+        "weekday": finish("weekday", range(7), weekday),
+        "minutes": finish("minutes", range(MINUTES_PER_DAY), histogram),
+    }
+
+
+def minute_histogram(hours, minutes):
+    # Events per minute of the day in a single bincount
+    minute_of_day = np.asarray(hours, dtype="int64") * 60 + np.asarray(
+        minutes, dtype="int64"
+    )
+    return np.bincount(minute_of_day, minlength=MINUTES_PER_DAY)
+
+
+def monthly_average(monthly_counts):
+    # Mean count per calendar month across years, January first
+    monthly_avg = monthly_counts.groupby(monthly_counts.index.strftime("%B")).mean()
+    monthly_avg.index = pd.CategoricalIndex(
+        monthly_avg.index, categories=MONTH_ORDER, ordered=True
+    )
+    return monthly_avg.sort_index()
+
+
+def bin_minutes(minute_counts, width=60):
+    # Collapse per-minute counts into width-minute buckets. Returns one row per
+    # bucket, indexed by its first minute, with "Hour Section" labels such as
+    # "07:00 to 08:00" and a "Frequency" column.
+    if MINUTES_PER_DAY % width:
+        raise ValueError(f"Bucket width must divide a day evenly, got {width}")
+    values = np.asarray(minute_counts, dtype="int64")
+    frequency = values.reshape(-1, width).sum(axis=1)
+    starts = np.arange(0, MINUTES_PER_DAY, width)
+    labels = [
+        f"{start // 60:02d}:{start % 60:02d} to "
+        f"{(start + width) // 60:02d}:{(start + width) % 60:02d}"
+        for start in starts
+    ]
+    return pd.DataFrame(
+        {"Hour Section": labels, "Frequency": frequency},
+        index=pd.Index(starts, name="Start"),
+    )
+
+
+def finish(insight, buckets, values):
+    values = pd.Series(values, dtype="int64")
+    if insight == "monthly":
+        index = pd.to_datetime(
+            pd.Index(buckets, dtype="int64").astype(str), format="%Y%m"
+        ).to_period("M")
+        return pd.Series(values.values, index=index.rename("Month_Year"), name="count")
+    if insight == "daily":
+        index = pd.DatetimeIndex(pd.to_datetime(list(buckets)), name="Date")
+        return pd.Series(values.values, index=index, name="count")
+    if insight == "weekday":
+        counts = pd.Series(values.values, index=pd.Index(buckets, dtype="int64"))
+        counts = counts.reindex(range(7), fill_value=0)
+        counts.index = pd.Index(DAY_ORDER, name="Day")
+        return counts.rename("count")
+    counts = pd.Series(values.values, index=pd.Index(buckets, dtype="int64"))
+    counts = counts.reindex(range(MINUTES_PER_DAY), fill_value=0)
+    return counts.rename_axis("Minute").rename("count")
+
+
+def merge_counts(cached, new):
+    merged = {}
+    for insight in INSIGHTS:
+        if insight in ("weekday", "minutes"):
+            # Fixed buckets: keep Monday..Sunday / minute-of-day order
+            merged[insight] = cached[insight] + new[insight]
+        else:
+            merged[insight] = (
+                cached[insight]
+                .add(new[insight], fill_value=0)
+                .astype("int64")
+                .sort_index()
+            )
+    return merged
+
+
+class FrequencyIndex:
+    # Days by their entry count, built once from a "daily" series (sorted by
+    # date, days without entries left out). Exact counts are a dict lookup
+    # and "at least N" a binary search over the days sorted by count. The
+    # longest run of consecutive days is precomputed for every threshold by
+    # adding days from the highest count down and joining adjacent runs.
+
+    def __init__(self, daily):
+        values = daily.to_numpy()
+        # Stable, so days with the same count stay in date order
+        order = np.argsort(values, kind="stable")
+        self._counts = values[order]
+        self._dates = daily.index[order]
+        self.frequencies = np.unique(self._counts)
+        starts = np.searchsorted(self._counts, self.frequencies, side="left")
+        ends = np.searchsorted(self._counts, self.frequencies, side="right")
+        self._exact = {
+            int(frequency): self._dates[start:end]
+            for frequency, start, end in zip(self.frequencies, starts, ends)
+        }
+        self._streaks = self._longest_streaks(starts, ends)
+
+    def _longest_streaks(self, starts, ends):
+        day_numbers = (self._dates.to_numpy().astype("datetime64[D]")).astype("int64")
+        run_end, run_start = {}, {}
+        best = (0, None, None)
+        streaks = [None] * len(self.frequencies)
+        for i in range(len(self.frequencies) - 1, -1, -1):
+            for day in day_numbers[starts[i] : ends[i]]:
+                first = run_start.pop(day - 1, day)
+                last = run_end.pop(day + 1, day)
+                run_end[first], run_start[last] = last, first
+                # Ties go to the earliest run
+                if (last - first + 1, -first) > (best[0], -(best[1] or 0)):
+                    best = (int(last - first + 1), first, last)
+            streaks[i] = best
+        return [
+            (length, pd.Timestamp(first, unit="D"), pd.Timestamp(last, unit="D"))
+            for length, first, last in streaks
+        ]
+
+    def exactly(self, frequency):
+        # Dates with exactly this many entries, in date order
+        return self._exact.get(int(frequency), self._dates[:0])
+
+    def at_least(self, frequency):
+        # Entry counts of the days with at least this many entries, by date
+        start = np.searchsorted(self._counts, frequency, side="left")
+        return pd.Series(
+            self._counts[start:], index=self._dates[start:], name="count"
+        ).sort_index()
+
+    def count_at_least(self, frequency):
+        return len(self._counts) - int(
+            np.searchsorted(self._counts, frequency, side="left")
+        )
+
+    def longest_streak(self, frequency=1):
+        # (days, first, last) of the longest run of consecutive days with at
+        # least this many entries each, or None when no day qualifies
+        i = np.searchsorted(self.frequencies, frequency, side="left")
+        if i == len(self.frequencies):
+            return None
+        return self._streaks[i]
+
+
+def index_counts(counts):
+    # Adds the "frequency" index; counts are otherwise left as they are
+    return {**counts, "frequency": FrequencyIndex(counts["daily"])}
+
+
+class CountsCache:
+    # Insight counts per table, engine and filter window, keyed by the table's
+    # MAX(ID). When new rows appear only rows above the cached high-water mark
+    # are read and merged; if MAX(ID) drops (latest entry deleted) the window
+    # is recounted, as is a rollup window on any change, since re-reading
+    # the day rows is cheap. The least recently used windows are evicted.
+    # Every version also gets its FrequencyIndex, under "frequency".
+
+    def __init__(self, max_entries=16):
+        # _lock only guards the dicts; a window is computed under its own
+        # lock, so one session recounting never blocks another's cache hit
+        self._lock = threading.Lock()
+        self._tables = OrderedDict()
+        self._key_locks = {}
+        self._generation = 0
+        self.max_entries = max_entries
+
+    def counts(self, db_cursor, table_name, backend, engine="sql", filters=None):
+        key = (table_name, engine, filters or Filters())
+        last_id = high_water_mark(db_cursor, table_name)
+        cached = self._get(key, last_id)
+        if cached is not None and cached[0] == last_id:
+            return cached[1]
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            # Another session may have counted this version meanwhile
+            cached = self._get(key, last_id)
+            if cached is not None and cached[0] == last_id:
+                return cached[1]
+            generation = self._generation
+            if cached is not None and cached[0] < last_id and engine != "rollup":
+                new = self._load(db_cursor, key, backend, cached[0], last_id)
+                counts = merge_counts(cached[1], new)
+            else:
+                counts = self._load(db_cursor, key, backend, 0, last_id)
+            counts = index_counts(counts)
+            self._put(key, last_id, counts, generation)
+            return counts
+
+    def _get(self, key, last_id):
+        with self._lock:
+            cached = self._tables.get(key)
+            if cached is not None and cached[0] == last_id:
+                self._tables.move_to_end(key)
+            return cached
+
+    def _put(self, key, last_id, counts, generation):
+        with self._lock:
+            # Counted before an invalidate(): may predate the change
+            if generation != self._generation:
+                return
+            self._tables[key] = (last_id, counts)
+            self._tables.move_to_end(key)
+            while len(self._tables) > self.max_entries:
+                evicted, _ = self._tables.popitem(last=False)
+                self._key_locks.pop(evicted, None)
+
+    def _load(self, db_cursor, key, backend, after_id, upto_id):
+        table_name, engine, filters = key
+        if engine == "rollup":
+            return query_rollup(db_cursor, table_name, filters)
+        if engine == "pandas":
+            df = fetch_events(
+                db_cursor, table_name, after_id, upto_id, filters, backend
+            )
+            return compute_counts(build_features(df))
+        return query_counts(db_cursor, table_name, backend, after_id, upto_id, filters)
+
+    def invalidate(self):
+        with self._lock:
+            self._tables.clear()
+            self._generation += 1
@@ -0,0 +1,139 @@
+"""Schema migrations for the timestamp tables.
+
+    python migrate.py datetime [--backend sqlite|mysql] [--chunk-size N]
+    python migrate.py rollup [--backend sqlite|mysql]
+
+"datetime" converts clean_data/raw_data from the legacy Date/Time string
+columns ("%d %B %Y", "%I:%M %p", IST) to a single indexed Timestamp DATETIME
+column holding UTC. Tables that are already migrated are left alone, and
+missing tables are created with the current schema.
+
+"rollup" rebuilds the daily_rollup table (events per IST day and hour) from
+clean_data/raw_data. The app keeps it up to date on every save and delete;
+rebuild it after changing the event tables by hand, or to backfill it.
+"""
+
+import argparse
+import sys
+
+import pandas as pd
+
+import db
+
+
+def migrate_datetime(pool, chunk_size):
+    with pool.connection() as conn:
+        db.ensure_schema(conn, pool.backend)
+        with db.cursor(conn) as db_cursor:
+            for table_name in db.TABLES:
+                columns = db.table_columns(db_cursor, table_name)
+                if "Date" not in columns:
+                    print(f"{table_name}: already migrated")
+                    continue
+                if "Timestamp" not in columns:
+                    db_cursor.execute(
+                        f"ALTER TABLE {table_name} ADD COLUMN Timestamp DATETIME NULL"
+                    )
+                    db_cursor.commit()
+                converted, failed = backfill(db_cursor, table_name, chunk_size)
+                if failed:
+                    print(
+                        f"{table_name}: {len(failed)} rows could not be parsed "
+                        f"(IDs {failed[:20]}); fix them and re-run. "
+                        "Legacy columns were kept."
+                    )
+                    return False
+                finish(db_cursor, table_name, pool.backend)
+                db.rebuild_rollup(db_cursor, table_name)
+                db_cursor.commit()
+                print(f"{table_name}: converted {converted} rows")
+    return True
+
+
+def rebuild_rollup(pool):
+    with pool.connection() as conn:
+        db.ensure_schema(conn, pool.backend)
+        with db.cursor(conn) as db_cursor:
+            for table_name in db.TABLES:
+                if "Timestamp" not in db.table_columns(db_cursor, table_name):
+                    print(f'{table_name}: run "migrate.py datetime" first')
+                    return False
+                days = db.rebuild_rollup(db_cursor, table_name)
+                db_cursor.commit()
+                print(f"{table_name}: {days} days rolled up")
+    return True
+
+
+def backfill(db_cursor, table_name, chunk_size):
+    last_id, converted, failed = 0, 0, []
+    while True:
+        db_cursor.execute(
+            f"SELECT ID, Date, Time FROM {table_name} "
+            "WHERE ID > %s ORDER BY ID LIMIT %s",
+            (last_id, chunk_size),
+        )
+        rows = db_cursor.fetchall()
+        if not rows:
+            return converted, failed
+        chunk = pd.DataFrame(rows, columns=["ID", "Date", "Time"])
+        timestamps = db.parse_legacy(chunk["Date"], chunk["Time"])
+        parsed = timestamps.notna()
+        failed.extend(chunk.loc[~parsed, "ID"].tolist())
+        values = [
+            (moment.to_pydatetime().replace(tzinfo=None), int(row_id))
+            for moment, row_id in zip(timestamps[parsed], chunk.loc[parsed, "ID"])
+        ]
+        db_cursor.executemany(
+            f"UPDATE {table_name} SET Timestamp = %s WHERE ID = %s", values
+        )
+        db_cursor.commit()
+        converted += len(values)
+        last_id = int(chunk["ID"].iloc[-1])
+
+
+def finish(db_cursor, table_name, backend):
+    if backend == "mysql":
+        db_cursor.execute(
+            f"ALTER TABLE {table_name} MODIFY ID INT NOT NULL AUTO_INCREMENT, "
+            "MODIFY Timestamp DATETIME NOT NULL, "
+            "DROP COLUMN Date, DROP COLUMN Time, "
+            f"ADD INDEX idx_{table_name}_timestamp (Timestamp)"
+        )
+        db_cursor.commit()
+        return
+    # SQLite cannot add NOT NULL to an existing column, so rebuild the table
+    legacy = f"{table_name}_legacy"
+    db_cursor.execute(f"ALTER TABLE {table_name} RENAME TO {legacy}")
+    for statement in db.SCHEMA[backend]:
+        db_cursor.execute(statement.format(table=table_name))
+    db_cursor.execute(
+        f"INSERT INTO {table_name} (ID, Timestamp) SELECT ID, Timestamp FROM {legacy}"
+    )
+    db_cursor.execute(f"DROP TABLE {legacy}")
+    db_cursor.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", default=db.DB_BACKEND, choices=["sqlite", "mysql"])
+    commands = parser.add_subparsers(dest="command", required=True)
+    datetime_parser = commands.add_parser(
+        "datetime", help="convert Date/Time strings to a Timestamp column"
+    )
+    datetime_parser.add_argument("--chunk-size", type=int, default=10000)
+    commands.add_parser("rollup", help="rebuild daily_rollup from the event tables")
+    args = parser.parse_args()
+
+    pool = db.create_pool(args.backend)
+    try:
+        if args.command == "rollup":
+            ok = rebuild_rollup(pool)
+        else:
+            ok = migrate_datetime(pool, args.chunk_size)
+    finally:
+        pool.close()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
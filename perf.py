@@ -0,0 +1,145 @@
+import contextvars
+import cProfile
+import functools
+import io
+import itertools
+import json
+import logging
+import marshal
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+
+# One JSON object per line: a "span" entry as each timed block finishes and a
+# "render" entry per script run. Nothing is written until configure_logging.
+logger = logging.getLogger("perf")
+
+PROFILE_LINES = 30
+
+_current = contextvars.ContextVar("perf_trace", default=None)
+_render_ids = itertools.count(1)
+
+
+class Trace:
+    # Spans finished during one render, innermost first, with their nesting
+    # depth so the breakdown can be shown as a tree
+
+    def __init__(self, label):
+        self.id = next(_render_ids)
+        self.label = label
+        self.started = time.time()
+        self.seconds = None
+        self.spans = []
+        self._depth = 0
+
+    def summary(self):
+        # Spans grouped by name: calls, total milliseconds and rows
+        totals = {}
+        for entry in self.spans:
+            total = totals.setdefault(
+                entry["name"], {"Span": entry["name"], "Calls": 0, "ms": 0.0}
+            )
+            total["Calls"] += 1
+            total["ms"] += entry["ms"]
+            if entry.get("rows") is not None:
+                total["Rows"] = total.get("Rows", 0) + entry["rows"]
+        return sorted(totals.values(), key=lambda total: -total["ms"])
+
+
+@contextmanager
+def trace(label):
+    current = Trace(label)
+    token = _current.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.seconds = time.perf_counter() - start
+        _current.reset(token)
+        log(
+            {
+                "event": "render",
+                "render": current.id,
+                "page": current.label,
+                "ms": round(current.seconds * 1000, 3),
+                "spans": len(current.spans),
+            }
+        )
+
+
+@contextmanager
+def span(name, **fields):
+    # Yields a dict the block can add fields to, such as "rows"
+    current = _current.get()
+    record = dict(fields)
+    depth = 0
+    if current is not None:
+        depth = current._depth
+        current._depth += 1
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        ms = (time.perf_counter() - start) * 1000
+        entry = {"name": name, "ms": ms, "depth": depth, **record}
+        if current is not None:
+            current._depth -= 1
+            current.spans.append(entry)
+        log(
+            {
+                "event": "span",
+                "render": current.id if current is not None else None,
+                **entry,
+                "ms": round(ms, 3),
+            }
+        )
+
+
+def timed(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(func.__name__):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def log(entry):
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps(entry, default=str))
+
+
+def configure_logging(destination):
+    # destination: a file path, or "-" for stderr
+    if logger.handlers:
+        return
+    if destination == "-":
+        handler = logging.StreamHandler(sys.stderr)
+    else:
+        handler = logging.FileHandler(destination)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+@contextmanager
+def profiled(enabled=True):
+    # cProfile around the block. The yielded dict gets a text "report" of the
+    # slowest calls and the raw "stats" (the .prof format snakeviz reads).
+    result = {}
+    if not enabled:
+        yield result
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        report = io.StringIO()
+        stats = pstats.Stats(profiler, stream=report)
+        stats.sort_stats("cumulative").print_stats(PROFILE_LINES)
+        result["report"] = report.getvalue()
+        result["stats"] = marshal.dumps(stats.stats)
@@ -0,0 +1,705 @@
+"""Declarative cleaning pipeline for the Data Cleaner.
+
+A Pipeline is an ordered list of steps, serializable to JSON so a recipe can
+be reapplied to other files. plan() rewrites it into an equivalent, cheaper
+list of steps: deleted columns are dropped as early as possible, row filters
+run before string transforms when that gives the same result, and adjacent
+string transforms are fused into one pass per column. Steps never modify
+their input frame, so intermediate results can be cached by step prefix.
+
+run_chunks() runs a pipeline over a stream of chunks when every step is
+chunk-local except a final Sort, which becomes an external merge sort that
+spills sorted runs to disk once a memory budget is reached.
+"""
+
+import dataclasses
+import hashlib
+import heapq
+import json
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+import dedup
+import ingest
+import perf
+
+
+@dataclass(frozen=True)
+class Replace:
+    value: str = "NULL"
+    op = "replace"
+
+    def apply(self, df):
+        df = df.copy(deep=False)
+        for column in df.select_dtypes(include="category").columns:
+            if self.value not in df[column].cat.categories:
+                df[column] = df[column].cat.add_categories([self.value])
+        return df.fillna(self.value)
+
+    def describe(self):
+        return "Replaced null values with custom value."
+
+
+@dataclass(frozen=True)
+class RemoveDuplicates:
+    subset: tuple = None
+    op = "remove_duplicates"
+
+    def apply(self, df):
+        return dedup.Deduplicator(self.subset).filter(df)
+
+    def describe(self):
+        if self.subset:
+            return f"Removed duplicate rows by: {', '.join(self.subset)}"
+        return "Removed duplicate rows."
+
+
+@dataclass(frozen=True)
+class RemoveMissing:
+    op = "remove_missing_values"
+
+    def apply(self, df):
+        return df.dropna()
+
+    def describe(self):
+        return "Removed rows with missing values."
+
+
+@dataclass(frozen=True)
+class Lowercase:
+    columns: tuple = ()
+    op = "convert_to_lowercase"
+
+    def apply(self, df):
+        return StringOps(((self.op, self.columns),)).apply(df)
+
+    def describe(self):
+        return f"Converted selected columns to lowercase: {', '.join(self.columns)}"
+
+
+@dataclass(frozen=True)
+class Capitalize:
+    columns: tuple = ()
+    op = "capitalize_column_values"
+
+    def apply(self, df):
+        return StringOps(((self.op, self.columns),)).apply(df)
+
+    def describe(self):
+        return f"Capitalized selected columns: {', '.join(self.columns)}"
+
+
+@dataclass(frozen=True)
+class DeleteColumns:
+    columns: tuple = ()
+    op = "delete_columns"
+
+    def apply(self, df):
+        return df.drop(columns=list(self.columns), errors="ignore")
+
+    def describe(self):
+        return f"Deleted selected columns: {', '.join(self.columns)}"
+
+
+@dataclass(frozen=True)
+class Sort:
+    # keys: ((column, ascending, na_position), ...), most significant first
+    keys: tuple = ()
+    op = "sort_column"
+
+    def apply(self, df):
+        keys = [key for key in self.keys if key[0] in df.columns]
+        if not keys:
+            return df
+        return df.iloc[sort_order(df, keys)]
+
+    def describe(self):
+        keys = ", then ".join(
+            f"'{column}' {'ascending' if ascending else 'descending'}"
+            f" (missing values {na_position})"
+            for column, ascending, na_position in self.keys
+        )
+        return f"Sorted by {keys}."
+
+
+@dataclass(frozen=True)
+class StringOps:
+    # Fused string transforms, produced by plan(): ((op, columns), ...)
+    ops: tuple = ()
+    op = "string_ops"
+
+    def apply(self, df):
+        per_column = {}
+        for op, columns in self.ops:
+            for column in columns:
+                per_column.setdefault(column, []).append(op)
+        df = df.copy(deep=False)
+        for column, ops in per_column.items():
+            if column in df.columns and ingest.is_text_column(df[column]):
+                df[column] = transform_strings(df[column], ops)
+        return df
+
+    def describe(self):
+        return "; ".join(f"{op}: {', '.join(columns)}" for op, columns in self.ops)
+
+
+def transform_strings(series, ops):
+    # A lowercase discards the effect of everything before it, so any run of
+    # ops reduces to: optional lowercase, then optional capitalize.
+    lower = Lowercase.op in ops
+    if lower:
+        ops = ops[len(ops) - 1 - ops[::-1].index(Lowercase.op) :]
+    capitalize = Capitalize.op in ops
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return _transform_categories(series, ops)
+    if isinstance(series.dtype, pd.StringDtype):
+        values = string_kernel(pa.array(series), lower, capitalize)
+        if series.dtype.storage == "pyarrow":
+            values = pd.arrays.ArrowStringArray(values)
+        return pd.Series(
+            values, index=series.index, name=series.name, dtype=series.dtype
+        )
+    if series.dtype != "object":
+        return series
+    # object column: only str cells change, anything else is kept as is
+    if pd.api.types.infer_dtype(series, skipna=True) == "string":
+        is_string = series.notna()
+    else:
+        is_string = series.apply(isinstance, args=(str,)).astype(bool)
+    strings = pa.array(series[is_string].to_numpy(), type=pa.string())
+    result = series.copy()
+    result[is_string] = string_kernel(strings, lower, capitalize).to_numpy(
+        zero_copy_only=False
+    )
+    return result
+
+
+def string_kernel(values, lower=False, capitalize=False):
+    # Lowercase/capitalize a pyarrow string array with the semantics of
+    # str.lower() and of capitalizing only when the first char is alphabetic.
+    # ASCII rows use Arrow's vectorized kernels; the few non-ASCII rows go
+    # through Python, whose Unicode case rules differ from Arrow's ("ß").
+    result = values
+    if lower:
+        result = pc.ascii_lower(result)
+    if capitalize:
+        first = pc.utf8_slice_codeunits(result, 0, 1)
+        result = pc.if_else(
+            pc.ascii_is_alpha(first), pc.ascii_capitalize(result), result
+        )
+    non_ascii = pc.fill_null(pc.invert(pc.string_is_ascii(values)), False)
+    if pc.any(non_ascii).as_py():
+        slow = [
+            _transform_value(value, lower, capitalize)
+            for value in pc.filter(values, non_ascii).to_pylist()
+        ]
+        result = pc.replace_with_mask(
+            result, non_ascii, pa.array(slow, type=result.type)
+        )
+    return result
+
+
+def _transform_value(value, lower, capitalize):
+    if lower:
+        value = value.lower()
+    if capitalize and value and value[0].isalpha():
+        value = value.capitalize()
+    return value
+
+
+def _transform_categories(series, ops):
+    # Transform each distinct value once, then remap the codes
+    categories = pd.Index(transform_strings(series.cat.categories.to_series(), ops))
+    if categories.is_unique:
+        return series.cat.rename_categories(categories)
+    unique = categories.unique()
+    codes = series.cat.codes.to_numpy()
+    remap = unique.get_indexer(categories)
+    codes = np.where(codes >= 0, remap[codes], -1)
+    return pd.Series(
+        pd.Categorical.from_codes(codes, categories=unique),
+        index=series.index,
+        name=series.name,
+    )
+
+
+def key_kind(series):
+    # The type a column sorts as: its own dtype, or numeric for text columns
+    # whose values all parse as numbers, otherwise their string form.
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(series.cat.categories.dtype)
+    if pd.api.types.is_bool_dtype(series.dtype) or pd.api.types.is_numeric_dtype(
+        series.dtype
+    ):
+        return "numeric"
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return "datetime"
+    values = series.dropna().astype(object)
+    if pd.to_numeric(values, errors="coerce").notna().all():
+        return "numeric"
+    return "string"
+
+
+def sort_values(series, kind):
+    # Comparable, null-preserving view of a column for sorting; never
+    # written back to the frame. Values that do not fit `kind` become null.
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(series.cat.categories.dtype)
+    if kind == "numeric":
+        if pd.api.types.is_bool_dtype(series.dtype):
+            return series.astype("float64")
+        if not pd.api.types.is_numeric_dtype(series.dtype):
+            series = series.astype(object)
+        return pd.to_numeric(series, errors="coerce")
+    if kind == "datetime":
+        return pd.to_datetime(series, errors="coerce")
+    values = series.astype(object)
+    return values.where(values.isna(), values.astype(str))
+
+
+def sort_order(df, keys, kinds=None):
+    # Stable row order for keys ((column, ascending, na_position), ...):
+    # each key becomes dense integer ranks so direction and null placement
+    # can differ per key, then np.lexsort orders by all of them at once.
+    ranks = []
+    for column, ascending, na_position in keys:
+        kind = kinds[column] if kinds else key_kind(df[column])
+        codes, uniques = pd.factorize(sort_values(df[column], kind), sort=True)
+        if not ascending:
+            codes = np.where(codes >= 0, len(uniques) - 1 - codes, codes)
+        if na_position == "last":
+            codes = np.where(codes >= 0, codes, len(uniques))
+        ranks.append(codes)
+    return np.lexsort(ranks[::-1])
+
+
+STEPS = {
+    step.op: step
+    for step in (
+        Replace,
+        RemoveDuplicates,
+        RemoveMissing,
+        Lowercase,
+        Capitalize,
+        DeleteColumns,
+        Sort,
+        StringOps,
+    )
+}
+STRING_STEPS = (Lowercase, Capitalize, StringOps)
+# Steps whose result on a file is the concatenation of their chunk results
+CHUNK_STEPS = (Replace, RemoveMissing, DeleteColumns) + STRING_STEPS
+# ... plus RemoveDuplicates, given one Deduplicator shared by all chunks
+
+SORT_MEMORY_BUDGET = 256 * 1024**2
+SORT_BLOCK_ROWS = 10_000
+
+
+def step_to_dict(step):
+    values = {
+        key: list(value) if isinstance(value, tuple) else value
+        for key, value in asdict(step).items()
+    }
+    return {"op": step.op, **values}
+
+
+def step_from_dict(values):
+    values = dict(values)
+    step = STEPS[values.pop("op")]
+    if step is Sort and "column" in values:
+        # Single-column recipes saved before multi-key sorting
+        values = {"keys": [[values["column"], values.get("ascending", True), "last"]]}
+    return step(
+        **{
+            key: (
+                _freeze(value) if key in ("columns", "subset", "ops", "keys") else value
+            )
+            for key, value in values.items()
+        }
+    )
+
+
+def _freeze(value):
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+@dataclass
+class Pipeline:
+    steps: list = field(default_factory=list)
+
+    def to_json(self):
+        return json.dumps(
+            {"steps": [step_to_dict(step) for step in self.steps]}, indent=2
+        )
+
+    @classmethod
+    def from_json(cls, text):
+        return cls([step_from_dict(values) for values in json.loads(text)["steps"]])
+
+    def plan(self):
+        return plan(self.steps)
+
+    def run(self, df, input_key=None, cache=None, deduplicators=None):
+        return run(df, self.plan(), input_key, cache, deduplicators)
+
+    def streamable(self):
+        return streamable(self.plan())
+
+    def run_chunks(self, chunks, memory_budget=SORT_MEMORY_BUDGET, deduplicators=None):
+        return run_chunks(chunks, self.plan(), memory_budget, deduplicators)
+
+    def deduplicators(self, on_dropped=None):
+        return new_deduplicators(self.plan(), on_dropped)
+
+
+def _columns(step):
+    if isinstance(step, StringOps):
+        return {column for _, columns in step.ops for column in columns}
+    return set(getattr(step, "columns", ()))
+
+
+def _without(step, deleted):
+    # Drop work on columns that a later DeleteColumns removes anyway
+    if isinstance(step, (Lowercase, Capitalize)):
+        columns = tuple(c for c in step.columns if c not in deleted)
+        return dataclasses.replace(step, columns=columns) if columns else None
+    if isinstance(step, StringOps):
+        ops = tuple(
+            (op, tuple(c for c in columns if c not in deleted))
+            for op, columns in step.ops
+        )
+        ops = tuple((op, columns) for op, columns in ops if columns)
+        return dataclasses.replace(step, ops=ops) if ops else None
+    return step
+
+
+def _delete_commutes(step, deleted):
+    if isinstance(step, (Replace, Lowercase, Capitalize, StringOps)):
+        return True
+    if isinstance(step, Sort):
+        return not {key[0] for key in step.keys} & deleted
+    if isinstance(step, RemoveDuplicates):
+        return bool(step.subset) and not set(step.subset) & deleted
+    return False
+
+
+def _filter_commutes(step, transform):
+    # Can row filter `step` run before column-local string `transform`?
+    if isinstance(step, RemoveMissing):
+        return True  # string transforms never create or remove nulls
+    if isinstance(step, RemoveDuplicates):
+        return bool(step.subset) and not set(step.subset) & _columns(transform)
+    return False
+
+
+def plan(steps):
+    steps = [step for step in steps if not _is_noop(step)]
+
+    # Push each DeleteColumns as early as it stays equivalent
+    i = 0
+    while i < len(steps):
+        if not isinstance(steps[i], DeleteColumns):
+            i += 1
+            continue
+        step = steps.pop(i)
+        deleted = set(step.columns)
+        j = i
+        while j > 0 and _delete_commutes(steps[j - 1], deleted):
+            pruned = _without(steps[j - 1], deleted)
+            if pruned is None:
+                steps.pop(j - 1)
+            else:
+                steps[j - 1] = pruned
+            j -= 1
+        if j > 0 and isinstance(steps[j - 1], DeleteColumns):
+            columns = steps[j - 1].columns
+            steps[j - 1] = DeleteColumns(
+                columns + tuple(c for c in step.columns if c not in columns)
+            )
+            i = j
+        else:
+            steps.insert(j, step)
+            i = j + 1
+
+    # Run row filters before the string transforms they commute with
+    for i in range(len(steps)):
+        j = i
+        while (
+            j > 0
+            and isinstance(steps[j], (RemoveMissing, RemoveDuplicates))
+            and isinstance(steps[j - 1], STRING_STEPS)
+            and _filter_commutes(steps[j], steps[j - 1])
+        ):
+            steps[j - 1], steps[j] = steps[j], steps[j - 1]
+            j -= 1
+
+    # Fuse adjacent string transforms into one pass per column
+    fused = []
+    for step in steps:
+        if (
+            isinstance(step, STRING_STEPS)
+            and fused
+            and isinstance(fused[-1], STRING_STEPS)
+        ):
+            fused[-1] = StringOps(_ops(fused[-1]) + _ops(step))
+        else:
+            fused.append(step)
+    return fused
+
+
+def _ops(step):
+    if isinstance(step, StringOps):
+        return step.ops
+    return ((step.op, step.columns),)
+
+
+def _is_noop(step):
+    if isinstance(step, (Lowercase, Capitalize, DeleteColumns)):
+        return not step.columns
+    if isinstance(step, Sort):
+        return not step.keys
+    return False
+
+
+class PrefixCache:
+    # LRU of intermediate frames keyed by (input, planned step prefix), so
+    # changing a late step reuses the results of the steps before it. A
+    # RemoveDuplicates step's entry also keeps what it removed.
+
+    def __init__(self, max_entries=16):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.max_entries = max_entries
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+        return None
+
+    def duplicates(self, key):
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key][1]
+        return None
+
+    def put(self, key, df, duplicates=None):
+        with self._lock:
+            self._entries[key] = (df, duplicates)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def prefix_keys(input_key, steps):
+    digest = hashlib.sha256(str(input_key).encode())
+    keys = []
+    for step in steps:
+        digest.update(json.dumps(step_to_dict(step), sort_keys=True).encode())
+        keys.append(digest.copy().hexdigest())
+    return keys
+
+
+def new_deduplicators(steps, on_dropped=None):
+    # Shared state for each RemoveDuplicates step, by position in `steps`.
+    # Passing the same dict to several run() calls removes duplicates across
+    # all of their frames, e.g. the chunks of a file or a workbook's sheets.
+    return {
+        i: dedup.Deduplicator(step.subset, on_dropped)
+        for i, step in enumerate(steps)
+        if isinstance(step, RemoveDuplicates)
+    }
+
+
+def run(df, steps, input_key=None, cache=None, deduplicators=None):
+    if deduplicators is not None:
+        for i, step in enumerate(steps):
+            if i in deduplicators:
+                df = timed_apply(step, df, deduplicators[i].filter)
+            else:
+                df = timed_apply(step, df)
+        return df
+    if cache is None or input_key is None:
+        for step in steps:
+            df = timed_apply(step, df)
+        return df
+    keys = prefix_keys(input_key, steps)
+    start = 0
+    for i in range(len(steps), 0, -1):
+        cached = cache.get(keys[i - 1])
+        if cached is not None:
+            df, start = cached, i
+            break
+    perf.log({"event": "pipeline", "steps": len(steps), "cached_steps": start})
+    for i in range(start, len(steps)):
+        if isinstance(steps[i], RemoveDuplicates):
+            df, duplicates = recorded_dedup(steps[i], df)
+            cache.put(keys[i], df, duplicates)
+        else:
+            df = timed_apply(steps[i], df)
+            cache.put(keys[i], df)
+    return df
+
+
+def recorded_dedup(step, df):
+    # Runs a RemoveDuplicates step, also returning the rows it removed and
+    # their per-key report
+    dropped = []
+    deduplicator = dedup.Deduplicator(step.subset, dropped.append)
+    df = timed_apply(step, df, deduplicator.filter)
+    return df, {
+        "removed": deduplicator.removed,
+        "report": deduplicator.report(),
+        "dropped": pd.concat(dropped) if dropped else df.iloc[:0],
+    }
+
+
+def removed_duplicates(df, steps, input_key, cache):
+    # {step position: what it removed} for the RemoveDuplicates steps, as
+    # recorded in the cache when they ran; evicted steps are rerun
+    keys = prefix_keys(input_key, steps)
+    found = {}
+    for i, step in enumerate(steps):
+        if not isinstance(step, RemoveDuplicates):
+            continue
+        if cache.duplicates(keys[i]) is None:
+            run(df, steps[: i + 1], input_key, cache)
+        found[i] = (keys[i], cache.duplicates(keys[i]))
+    return found
+
+
+def timed_apply(step, df, apply=None):
+    with perf.span(f"step.{type(step).__name__}", rows_in=len(df)) as record:
+        df = (apply or step.apply)(df)
+        record["rows"] = len(df)
+    return df
+
+
+def streamable(steps):
+    chunk_steps = CHUNK_STEPS + (RemoveDuplicates,)
+    return all(isinstance(step, chunk_steps) for step in steps[:-1]) and (
+        not steps or isinstance(steps[-1], chunk_steps + (Sort,))
+    )
+
+
+def run_chunks(chunks, steps, memory_budget=SORT_MEMORY_BUDGET, deduplicators=None):
+    # Yields the cleaned frame in pieces; steps must pass streamable()
+    if deduplicators is None:
+        deduplicators = new_deduplicators(steps)
+    if steps and isinstance(steps[-1], Sort):
+        chunks = (
+            run(chunk, steps[:-1], deduplicators=deduplicators) for chunk in chunks
+        )
+        return external_sort(chunks, steps[-1].keys, memory_budget)
+    return (run(chunk, steps, deduplicators=deduplicators) for chunk in chunks)
+
+
+class _Descending:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def _row_keys(block, keys, kinds):
+    # One comparable tuple per row, ordering exactly like sort_order()
+    columns = []
+    for column, ascending, na_position in keys:
+        values = sort_values(block[column], kinds[column])
+        null_rank = 1 if na_position == "last" else 0
+        columns.append(
+            [
+                (
+                    (null_rank, 0)
+                    if missing
+                    else (1 - null_rank, value if ascending else _Descending(value))
+                )
+                for missing, value in zip(values.isna().tolist(), values.tolist())
+            ]
+        )
+    return zip(*columns)
+
+
+def external_sort(chunks, keys, memory_budget=SORT_MEMORY_BUDGET):
+    # Sorts chunks that together may not fit in memory: buffered chunks are
+    # sorted into runs, spilled to temp files in blocks once they exceed
+    # memory_budget bytes, then k-way merged. Kinds are inferred from the
+    # first chunk, so later values that do not fit sort as missing.
+    chunks = iter(chunks)
+    first = next(chunks, None)
+    if first is None:
+        return
+    keys = [key for key in keys if key[0] in first.columns]
+    kinds = {column: key_kind(first[column]) for column, _, _ in keys}
+    with tempfile.TemporaryDirectory(prefix="sort-") as directory:
+        runs, buffer, size = [], [], 0
+        for chunk in _prepend(first, chunks):
+            buffer.append(chunk)
+            size += int(chunk.memory_usage(deep=True).sum())
+            if size >= memory_budget:
+                runs.append(_spill(buffer, keys, kinds, directory, len(runs)))
+                buffer, size = [], 0
+        if not runs:
+            run_df = pd.concat(buffer, ignore_index=True)
+            yield run_df.iloc[sort_order(run_df, keys, kinds)]
+            return
+        if buffer:
+            runs.append(_spill(buffer, keys, kinds, directory, len(runs)))
+        merged = heapq.merge(
+            *(_run_rows(path, keys, kinds) for path in runs),
+            key=lambda item: item[0],
+        )
+        columns, rows = list(first.columns), []
+        for _, row in merged:
+            rows.append(row)
+            if len(rows) == SORT_BLOCK_ROWS:
+                yield pd.DataFrame(rows, columns=columns)
+                rows = []
+        if rows:
+            yield pd.DataFrame(rows, columns=columns)
+
+
+def _prepend(first, chunks):
+    yield first
+    yield from chunks
+
+
+def _spill(buffer, keys, kinds, directory, number):
+    run_df = pd.concat(buffer, ignore_index=True)
+    run_df = run_df.iloc[sort_order(run_df, keys, kinds)]
+    path = os.path.join(directory, f"run-{number}.pkl")
+    with open(path, "wb") as f:
+        for start in range(0, len(run_df), SORT_BLOCK_ROWS):
+            pickle.dump(run_df.iloc[start : start + SORT_BLOCK_ROWS], f)
+    return path
+
+
+def _run_rows(path, keys, kinds):
+    with open(path, "rb") as f:
+        while True:
+            try:
+                block = pickle.load(f)
+            except EOFError:
+                return
+            yield from zip(
+                _row_keys(block, keys, kinds),
+                block.itertuples(index=False, name=None),
+            )
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+import dedup
+
+# Columns longer than this get a HyperLogLog estimate instead of an exact
+# distinct count; 2**HLL_PRECISION registers give about 0.8% standard error
+EXACT_DISTINCT_ROWS = 100_000
+HLL_PRECISION = 14
+
+
+def profile(df, exact_rows=EXACT_DISTINCT_ROWS):
+    # Per-column stats for picking cleaning options. Null counts come from one
+    # vectorized isna() over the frame; distinct counts need one hash pass per
+    # column at most.
+    rows = len(df)
+    nulls = df.isna().sum().to_numpy()
+    non_null = rows - nulls
+    distinct = np.array(
+        [distinct_count(df.iloc[:, i], exact_rows) for i in range(df.shape[1])],
+        dtype="int64",
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        null_share = np.where(rows > 0, nulls / max(rows, 1), 0.0)
+        duplicate_share = np.where(non_null > 0, 1 - distinct / non_null, 0.0)
+    return pd.DataFrame(
+        {
+            "Column": [str(column) for column in df.columns],
+            "Type": [str(dtype) for dtype in df.dtypes],
+            "Values": [
+                pd.api.types.infer_dtype(df.iloc[:, i], skipna=True)
+                for i in range(df.shape[1])
+            ],
+            "Nulls": nulls,
+            "Null %": np.round(null_share * 100, 1),
+            "Distinct": distinct,
+            "Duplicate %": np.round(np.clip(duplicate_share, 0, 1) * 100, 1),
+        }
+    )
+
+
+def duplicate_row_share(df):
+    if not len(df):
+        return 0.0
+    return 1 - len(np.unique(dedup.fingerprints(df))) / len(df)
+
+
+def distinct_count(series, exact_rows=EXACT_DISTINCT_ROWS):
+    if len(series) <= exact_rows:
+        return int(series.nunique())
+    values = series.dropna()
+    hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+    return approximate_distinct(hashes)
+
+
+def approximate_distinct(hashes, precision=HLL_PRECISION):
+    # HyperLogLog over 64-bit hashes: the top bits pick a register, which
+    # keeps the longest run of leading zeros seen in the remaining bits
+    if not len(hashes):
+        return 0
+    registers_count = 1 << precision
+    width = 64 - precision
+    index = (hashes >> np.uint64(width)).astype("int64")
+    rest = hashes & np.uint64((1 << width) - 1)
+    # frexp's exponent is the bit length; exact for values below 2**53
+    bit_length = np.frexp(rest.astype("float64"))[1]
+    rank = (width - bit_length + 1).astype("int64")
+    registers = np.zeros(registers_count, dtype="int64")
+    maxima = pd.Series(rank).groupby(index).max()
+    registers[maxima.index.to_numpy()] = maxima.to_numpy()
+    alpha = 0.7213 / (1 + 1.079 / registers_count)
+    estimate = alpha * registers_count**2 / np.sum(np.exp2(-registers.astype(float)))
+    zeros = int(np.sum(registers == 0))
+    if estimate <= 2.5 * registers_count and zeros:
+        # Linear counting is more accurate for small cardinalities
+        estimate = registers_count * np.log(registers_count / zeros)
+    return int(round(estimate))
@@ -0,0 +1,49 @@
+import streamlit as st
+
+import db
+import insights
+import writebehind
+
+
+# Shared by every session; connections are checked out per operation, so the
+# database is first contacted when a page actually uses it
+@st.cache_resource
+def get_pool():
+    return db.create_pool()
+
+
+# Saves are queued locally and written to the database by one worker thread.
+# on_flush runs on that thread, outside any script run, so the caches it
+# clears are looked up here instead of through st.cache_resource there.
+@st.cache_resource
+def get_event_writer():
+    counts_cache = get_counts_cache()
+    clear_events = load_events.clear
+
+    def on_flush():
+        counts_cache.invalidate()
+        clear_events()
+
+    return writebehind.EventWriter(
+        get_pool(), writebehind.EventQueue(), on_flush=on_flush
+    )
+
+
+# Analysis results shared by every session, refreshed from the table's MAX(ID)
+@st.cache_resource
+def get_counts_cache():
+    return insights.CountsCache()
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_events(table_name, last_id, filters):
+    pool = get_pool()
+    with pool.connection() as conn, db.cursor(conn) as cursor:
+        return insights.fetch_events(
+            cursor, table_name, upto_id=last_id, filters=filters, backend=pool.backend
+        )
+
+
+def invalidate_analysis_cache():
+    get_counts_cache().invalidate()
+    load_events.clear()
@@ -0,0 +1,251 @@
+"""Parquet snapshots of the timestamp tables.
+
+    python snapshot.py export [DIR] [--backend sqlite|mysql] [--chunk-size N]
+    python snapshot.py import DIR [--backend sqlite|mysql]
+
+"export" streams clean_data/raw_data in ID order into Parquet files
+partitioned by local (IST) year and month:
+
+    DIR/raw_data/year=2024/month=6/part-0.parquet
+
+Each file holds a uint32 ID and a second-resolution UTC Timestamp, zstd
+compressed. DIR/snapshot.json records the row count and highest ID of each
+table. The snapshot is written next to DIR and renamed into place once
+complete. DIR defaults to a new directory under SNAPSHOT_DIR.
+
+"import" replaces both tables with the snapshot's rows, keeping their IDs,
+and rebuilds daily_rollup.
+
+The Analysis page lists the snapshots under SNAPSHOT_DIR and can compute its
+insights from one without a database connection. The files are read
+memory-mapped, and only the Timestamp column and the partitions inside the
+selected period are loaded.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+
+import db
+import insights
+from snapshot_index import MANIFEST, SNAPSHOT_DIR, list_snapshots, manifest
+
+# Errors raised reading a missing or damaged snapshot
+Error = (OSError, ValueError, pa.ArrowException)
+TIMESTAMP = pa.timestamp("s", tz="UTC")
+SCHEMA = pa.schema([("ID", pa.uint32()), ("Timestamp", TIMESTAMP)])
+PARTITIONING = ds.partitioning(
+    pa.schema([("year", pa.int16()), ("month", pa.int8())]), flavor="hive"
+)
+
+
+def new_directory(root=SNAPSHOT_DIR):
+    return os.path.join(root, datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S"))
+
+
+def export_snapshot(db_cursor, directory, chunk_size=100_000):
+    partial = f"{directory}.partial"
+    shutil.rmtree(partial, ignore_errors=True)
+    manifest = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "tables": {},
+    }
+    for table_name in db.TABLES:
+        manifest["tables"][table_name] = export_table(
+            db_cursor, table_name, os.path.join(partial, table_name), chunk_size
+        )
+    with open(os.path.join(partial, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(partial, directory)
+    return manifest
+
+
+def export_table(db_cursor, table_name, directory, chunk_size):
+    # Chunks arrive in ID order, so each month's file is written in order;
+    # one writer stays open per month until the table is done
+    db_cursor.execute(f"SELECT ID, Timestamp FROM {table_name} ORDER BY ID")
+    writers = {}
+    rows, max_id = 0, 0
+    try:
+        while True:
+            chunk = db_cursor.fetchmany(chunk_size)
+            if not chunk:
+                break
+            ids = pd.Series([row[0] for row in chunk], dtype="uint32")
+            stored = pd.to_datetime(pd.Series([row[1] for row in chunk]))
+            local = db.to_local(stored)
+            months = local.dt.year * 100 + local.dt.month
+            for month in months.unique():
+                selected = (months == month).to_numpy()
+                if month not in writers:
+                    path = os.path.join(
+                        directory, f"year={month // 100}", f"month={month % 100}"
+                    )
+                    os.makedirs(path)
+                    writers[month] = pq.ParquetWriter(
+                        os.path.join(path, "part-0.parquet"),
+                        SCHEMA,
+                        compression="zstd",
+                    )
+                writers[month].write_table(
+                    pa.table(
+                        [
+                            pa.array(ids[selected], pa.uint32()),
+                            pa.array(
+                                stored[selected].to_numpy().astype("datetime64[s]"),
+                                TIMESTAMP,
+                            ),
+                        ],
+                        schema=SCHEMA,
+                    )
+                )
+            rows += len(chunk)
+            max_id = int(ids.iloc[-1])
+    finally:
+        for writer in writers.values():
+            writer.close()
+    os.makedirs(directory, exist_ok=True)
+    return {"rows": rows, "max_id": max_id, "months": len(writers)}
+
+
+def import_snapshot(db_cursor, directory, batch_size=100_000):
+    # Replaces each table with its snapshot rows and recounts its rollup,
+    # one transaction per table
+    counts = {}
+    for table_name in db.TABLES:
+        db_cursor.execute(f"DELETE FROM {table_name}")
+        counts[table_name] = 0
+        for batch in dataset(directory, table_name).to_batches(
+            columns=["ID", "Timestamp"], batch_size=batch_size
+        ):
+            ids = batch.column("ID").to_pylist()
+            # Naive UTC datetimes, the way the Timestamp column stores them
+            stored = (
+                batch.column("Timestamp")
+                .to_numpy()
+                .astype("datetime64[s]")
+                .astype(object)
+            )
+            db_cursor.executemany(
+                f"INSERT INTO {table_name} (ID, Timestamp) VALUES (%s, %s)",
+                list(zip(ids, stored)),
+            )
+            counts[table_name] += len(ids)
+        db.rebuild_rollup(db_cursor, table_name)
+        db_cursor.commit()
+    return counts
+
+
+def dataset(directory, table_name):
+    return ds.dataset(
+        os.path.join(directory, table_name),
+        schema=pa.unify_schemas([SCHEMA, PARTITIONING.schema]),
+        format="parquet",
+        partitioning=PARTITIONING,
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+
+
+def read_events(directory, table_name, filters=None, columns=("ID", "Timestamp")):
+    # Same frame as insights.fetch_events. The date range prunes partitions
+    # and row groups; weekday and hour are checked on the rows read.
+    filters = filters or insights.Filters()
+    table = dataset(directory, table_name).to_table(
+        columns=list(columns), filter=date_filter(filters)
+    )
+    df = table.to_pandas()
+    df["Timestamp"] = df["Timestamp"].dt.tz_convert(db.LOCAL_TIMEZONE)
+    if filters.weekdays:
+        df = df[df["Timestamp"].dt.weekday.isin(filters.weekdays)]
+    if filters.hours:
+        df = df[df["Timestamp"].dt.hour.isin(filters.hours)]
+    if "ID" in df:
+        df = df.sort_values("ID")
+    return df.reset_index(drop=True)
+
+
+def date_filter(filters):
+    year, month = ds.field("year"), ds.field("month")
+    offset = insights.local_offset_minutes()
+    conditions = []
+    if filters.start is not None:
+        start = filters.start
+        conditions.append(
+            (year > start.year) | ((year == start.year) & (month >= start.month))
+        )
+        conditions.append(
+            ds.field("Timestamp")
+            >= pa.scalar(insights.utc_midnight(start, offset), TIMESTAMP)
+        )
+    if filters.end is not None:
+        end = filters.end
+        conditions.append(
+            (year < end.year) | ((year == end.year) & (month <= end.month))
+        )
+        conditions.append(
+            ds.field("Timestamp")
+            < pa.scalar(
+                insights.utc_midnight(end + timedelta(days=1), offset), TIMESTAMP
+            )
+        )
+    if not conditions:
+        return None
+    expression = conditions[0]
+    for condition in conditions[1:]:
+        expression = expression & condition
+    return expression
+
+
+def query_counts(directory, table_name, filters=None):
+    # Insight counts from a snapshot, as the pandas engine computes them
+    df = read_events(directory, table_name, filters, columns=("Timestamp",))
+    return insights.index_counts(insights.compute_counts(insights.build_features(df)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", default=db.DB_BACKEND, choices=["sqlite", "mysql"])
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="write a snapshot")
+    export_parser.add_argument("directory", nargs="?")
+    export_parser.add_argument("--chunk-size", type=int, default=100_000)
+    import_parser = commands.add_parser("import", help="restore a snapshot")
+    import_parser.add_argument("directory")
+    args = parser.parse_args()
+
+    if args.command == "import" and not os.path.isfile(
+        os.path.join(args.directory, MANIFEST)
+    ):
+        print(f"{args.directory}: not a snapshot (no {MANIFEST})")
+        sys.exit(1)
+    pool = db.create_pool(args.backend)
+    try:
+        with pool.connection() as conn, db.cursor(conn) as db_cursor:
+            if args.command == "export":
+                directory = args.directory or new_directory()
+                tables = export_snapshot(db_cursor, directory, args.chunk_size)
+                for table_name, info in tables["tables"].items():
+                    print(
+                        f"{table_name}: {info['rows']} rows in {info['months']} "
+                        f"months -> {directory}"
+                    )
+            else:
+                for table_name, rows in import_snapshot(
+                    db_cursor, args.directory
+                ).items():
+                    print(f"{table_name}: {rows} rows restored")
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
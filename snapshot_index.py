@@ -0,0 +1,26 @@
+import json
+import os
+
+# The snapshots on disk and their manifests, without pyarrow: the Analysis
+# page lists them on every render, and only imports snapshot to read one.
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")
+MANIFEST = "snapshot.json"
+
+
+def list_snapshots(root=SNAPSHOT_DIR):
+    # Complete snapshots under root, newest first
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        (
+            os.path.join(root, name)
+            for name in os.listdir(root)
+            if os.path.isfile(os.path.join(root, name, MANIFEST))
+        ),
+        reverse=True,
+    )
+
+
+def manifest(directory):
+    with open(os.path.join(directory, MANIFEST)) as f:
+        return json.load(f)
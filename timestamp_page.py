@@ -0,0 +1,213 @@
+import io
+import os
+from datetime import datetime
+
+import pytz
+import streamlit as st
+
+import db
+import insights
+import resources
+
+LOGIN_PASSWORD = os.getenv("LOGIN_PASSWORD")
+ENTRY_PAGE_SIZES = (25, 50, 100, 500)
+
+
+def login_page():
+    password = st.text_input("Enter Password", type="password")
+    return password
+
+
+def save_current_datetime(password_entered):
+    if password_entered == LOGIN_PASSWORD:
+
+        ist_timezone = pytz.timezone("Asia/Kolkata")
+        current_datetime_ist = datetime.now(ist_timezone)
+
+        formatted_date = current_datetime_ist.strftime("%d %B %Y")
+        formatted_time = current_datetime_ist.strftime("%I:%M %p").lower()
+
+        # Queued locally; the database write happens in the background
+        resources.get_event_writer().save(current_datetime_ist)
+
+        st.success(f"Saved: {formatted_date} {formatted_time} (IST)")
+    else:
+        st.error("Wrong Password")
+
+
+def count_round_trips(db_cursor):
+    total = st.session_state.get("db_round_trips", 0) + db_cursor.round_trips
+    st.session_state["db_round_trips"] = total
+    st.caption(f"Database round trips: {db_cursor.round_trips} (this session: {total})")
+
+
+def view_previous_entries(table_name, file_name):
+    st.subheader(f"Previous Entries")
+    state = st.session_state
+    if state.get("entries_table") != table_name:
+        state["entries_table"] = table_name
+        state["entries_pages"] = [None]
+
+    page_size = st.selectbox(
+        "Entries per page:", ENTRY_PAGE_SIZES, key="entries_page_size"
+    )
+    jump_date = st.date_input("Jump to date:", value=None, key="entries_jump_date")
+    st.button(
+        "Go to date",
+        on_click=jump_to_date,
+        args=(table_name, jump_date),
+        disabled=jump_date is None,
+    )
+
+    with resources.get_pool().connection() as conn, db.cursor(conn) as db_cursor:
+        df = db.fetch_page(db_cursor, table_name, state["entries_pages"][-1], page_size)
+        last_id = insights.high_water_mark(db_cursor, table_name)
+    # A prepared CSV is dropped once entries are saved or deleted, so it is
+    # never served stale and is not kept in the session longer than needed
+    csv_key = (table_name, last_id)
+    if state.get("entries_csv", (None,))[0] != csv_key:
+        state.pop("entries_csv", None)
+
+    if not df.empty:
+        state["entries_last_id"] = int(df["ID"].iloc[-1])
+        st.dataframe(db.legacy_frame(df), hide_index=True, use_container_width=True)
+    else:
+        st.write("No entries found.")
+
+    previous_column, next_column = st.columns(2)
+    previous_column.button(
+        "Newer entries",
+        on_click=change_entries_page,
+        args=(-1,),
+        disabled=len(state["entries_pages"]) == 1,
+    )
+    next_column.button(
+        "Older entries",
+        on_click=change_entries_page,
+        args=(1,),
+        disabled=len(df) < page_size,
+    )
+
+    if st.button("Prepare CSV download"):
+        csv_file = io.BytesIO()
+        with resources.get_pool().connection() as conn, db.cursor(conn) as db_cursor:
+            db.stream_csv(db_cursor, table_name, csv_file)
+        state["entries_csv"] = (csv_key, csv_file.getvalue())
+    if "entries_csv" in state:
+        st.download_button(
+            label="Download CSV",
+            data=state["entries_csv"][1],
+            file_name=file_name,
+            mime="text/csv",
+        )
+
+
+def change_entries_page(step):
+    pages = st.session_state["entries_pages"]
+    if step > 0:
+        pages.append(st.session_state["entries_last_id"])
+    elif len(pages) > 1:
+        pages.pop()
+
+
+def jump_to_date(table_name, day):
+    with resources.get_pool().connection() as conn, db.cursor(conn) as db_cursor:
+        before_id = db.page_start_for_date(db_cursor, table_name, day)
+    st.session_state["entries_pages"] = [None, before_id]
+
+
+def delete_latest_entry(password_entered):
+    if password_entered == LOGIN_PASSWORD:
+        # Queued saves go first, so the latest entry is really the latest
+        resources.get_event_writer().flush()
+        with resources.get_pool().connection() as conn, db.cursor(conn) as db_cursor:
+            if db.delete_latest(db_cursor):
+                resources.invalidate_analysis_cache()
+                st.success("Latest entry deleted from both tables.")
+            else:
+                st.warning("No entries found to delete in table.")
+        count_round_trips(db_cursor)
+    else:
+        st.error("Wrong Password")
+
+
+def create_snapshot(password_entered):
+    if password_entered == LOGIN_PASSWORD:
+        # Imported here: pyarrow.dataset is only needed for snapshots
+        import snapshot
+
+        # Queued saves go first, so the snapshot has every saved entry
+        resources.get_event_writer().flush()
+        directory = snapshot.new_directory()
+        pool = resources.get_pool()
+        try:
+            with pool.connection() as conn, db.cursor(conn) as db_cursor:
+                manifest = snapshot.export_snapshot(db_cursor, directory)
+        except snapshot.Error as e:
+            st.error(f"Could not write the snapshot: {e}")
+            return
+        rows = ", ".join(
+            f"{table_name}: {info['rows']} rows"
+            for table_name, info in manifest["tables"].items()
+        )
+        st.success(f"Snapshot written to {directory} ({rows})")
+    else:
+        st.error("Wrong Password")
+
+
+def show_pending_entries():
+    writer = resources.get_event_writer()
+    pending = writer.pending()
+    if not pending:
+        st.caption("All saved entries are in the database.")
+    elif writer.last_error is None:
+        st.caption(f"Entries waiting to be written to the database: {pending}")
+    else:
+        st.warning(
+            f"{pending} saved entries are waiting for the database and will be "
+            f"written when it is reachable again. Last error: {writer.last_error}"
+        )
+
+
+def refresh():
+    st.rerun()
+
+
+def show():
+    st.header("Timestamp")
+    if st.button("Refresh"):
+        st.experimental_rerun()
+    password_entered = login_page()
+    # An unreachable database is reported here instead of stopping the app
+    try:
+        if st.button("Save Date and Time"):
+            save_current_datetime(password_entered)
+        if st.button("Delete Latest Entry"):
+            delete_latest_entry(password_entered)
+        if st.button("Create Snapshot"):
+            create_snapshot(password_entered)
+        show_pending_entries()
+        if st.button("Previous Entries (Cleaned)"):
+            st.session_state["entries_view"] = ("clean_data", "cleaned_data.csv")
+        if st.button("Previous Entries (Raw)"):
+            st.session_state["entries_view"] = ("raw_data", "raw_data.csv")
+        # Kept in session state so paging through entries survives reruns
+        if "entries_view" in st.session_state:
+            view_previous_entries(*st.session_state["entries_view"])
+    except db.Error + (db.PoolTimeout,) as e:
+        st.error(f"Database unavailable: {e}")
+
+    st.sidebar.markdown("### Project Description")
+    st.sidebar.markdown(
+        """
+    This project provides a secure interface for managing timestamp entries in a MySQL database. 
+You can perform the following operations:
+
+- **Save Date and Time:** Save the current date and time (in IST) into the database. Saves are queued on the server and written in the background, so none are lost while the database is unreachable; the number still waiting is shown on the page.
+- **Delete Latest Entry:** Remove the most recent timestamp entry from the database.
+- **View Previous Entries:** Page through previous timestamp entries (cleaned or raw), jump to a date, and download them as CSV.
+- **Create Snapshot:** Write both tables to Parquet files on the server, partitioned by year and month, for backups and for the Analysis page to read without the database.
+
+All operations for saving and deleting timestamps are password-protected.
+    """
+    )
@@ -0,0 +1,165 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import db
+import perf
+
+QUEUE_PATH = os.getenv("EVENT_QUEUE_PATH", "pending_events.db")
+FLUSH_BATCH = 500
+# Seconds between prunes of old applied event IDs
+PRUNE_INTERVAL = 3600
+
+
+class EventQueue:
+    # Saves not yet written to the database, in save order. A local SQLite
+    # file committed on every append, so queued saves survive a restart.
+
+    def __init__(self, path=QUEUE_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, detect_types=sqlite3.PARSE_DECLTYPES
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pending "
+            "(Seq INTEGER PRIMARY KEY AUTOINCREMENT, EventID TEXT NOT NULL UNIQUE, "
+            "Timestamp DATETIME NOT NULL)"
+        )
+        self._conn.commit()
+
+    def append(self, event_id, stored):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO pending (EventID, Timestamp) VALUES (?, ?)",
+                (event_id, stored),
+            )
+            self._conn.commit()
+
+    def peek(self, limit):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT EventID, Timestamp FROM pending ORDER BY Seq LIMIT ?",
+                (limit,),
+            ).fetchall()
+
+    def remove(self, event_ids):
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM pending WHERE EventID = ?",
+                [(event_id,) for event_id in event_ids],
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class EventWriter:
+    # Write-behind saves: save() appends to the queue and returns at once. A
+    # worker thread writes queued saves to both tables in batches, and while
+    # the database is unavailable retries with a doubling delay. Every save
+    # carries a client event ID, so a batch is never written twice.
+
+    def __init__(
+        self,
+        pool,
+        queue,
+        on_flush=None,
+        batch_size=FLUSH_BATCH,
+        retry_delay=1.0,
+        max_retry_delay=60.0,
+    ):
+        self.pool = pool
+        self.queue = queue
+        self.on_flush = on_flush
+        self.batch_size = batch_size
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.failures = 0
+        self.last_error = None
+        self._schema_checked = False
+        self._next_prune = 0.0
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="event-writer", daemon=True
+        )
+        self._thread.start()
+
+    def save(self, moment):
+        event_id = uuid.uuid4().hex
+        self.queue.append(event_id, db.to_storage(moment))
+        self._wake.set()
+        return event_id
+
+    def pending(self):
+        return len(self.queue)
+
+    def flush(self):
+        # Writes everything queued so far; database errors are raised
+        written = 0
+        with self._flush_lock:
+            try:
+                while True:
+                    events = self.queue.peek(self.batch_size)
+                    if not events:
+                        break
+                    with perf.span("writebehind.flush", rows=len(events)) as record:
+                        with self.pool.connection() as conn:
+                            if not self._schema_checked:
+                                db.ensure_schema(conn, self.pool.backend)
+                                self._schema_checked = True
+                            with db.cursor(conn) as db_cursor:
+                                record["written"] = db.insert_events(db_cursor, events)
+                    # Removed only once committed; if this is lost, the
+                    # resent events are skipped by their IDs
+                    self.queue.remove([event_id for event_id, _ in events])
+                    written += record["written"]
+            finally:
+                if written and self.on_flush is not None:
+                    self.on_flush()
+        return written
+
+    def _prune(self):
+        # Best effort, from the worker only: a failure waits for the next
+        # interval and never fails a flush
+        if not self._schema_checked or time.monotonic() < self._next_prune:
+            return
+        self._next_prune = time.monotonic() + PRUNE_INTERVAL
+        try:
+            with self.pool.connection() as conn, db.cursor(conn) as db_cursor:
+                db.prune_events(db_cursor)
+        except Exception:
+            pass
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.flush()
+            except Exception as e:
+                self.failures += 1
+                self.last_error = e
+                delay = self.retry_delay * 2 ** min(self.failures - 1, 16)
+                self._stop.wait(min(delay, self.max_retry_delay))
+                continue
+            self.failures = 0
+            self.last_error = None
+            self._prune()
+            self._wake.wait()
+            self._wake.clear()
+
+    def close(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        self.queue.close()